@@ -2,7 +2,11 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from django.utils import timezone
 from .models import Post, Category, Comment
+from .comments import invalidate_comment_trees
+from .counters import refresh_counts_for_posts
+from portfolio.signals import invalidate_queryset
 
 
 @admin.register(Category)
@@ -14,12 +18,13 @@ class CategoryAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     
     def posts_count(self, obj):
-        count = obj.posts.filter(status='published').count()
+        count = obj.published_posts_count
         if count > 0:
             url = reverse('admin:blog_post_changelist') + f'?category__id__exact={obj.id}'
             return format_html('<a href="{}">{} posts</a>', url, count)
         return '0 posts'
     posts_count.short_description = 'Published Posts'
+    posts_count.admin_order_field = 'published_posts_count'
 
 
 @admin.register(Post)
@@ -93,7 +98,7 @@ class PostAdmin(admin.ModelAdmin):
     featured_image_preview_large.short_description = 'Featured Image Preview'
     
     def reading_time_display(self, obj):
-        time = obj.get_reading_time()
+        time = obj.reading_time
         return f"{time} minute{'s' if time != 1 else ''}"
     reading_time_display.short_description = 'Estimated Reading Time'
     
@@ -101,25 +106,30 @@ class PostAdmin(admin.ModelAdmin):
         if not obj.author_id:
             obj.author = request.user
         
-        # Auto-calculate reading time
-        obj.reading_time = obj.get_reading_time()
-        
+        # Reading time and the other content artifacts are computed in Post.save
         super().save_model(request, obj, form, change)
     
     actions = ['make_published', 'make_draft', 'make_archived']
     
     def make_published(self, request, queryset):
-        updated = queryset.update(status='published')
+        queryset.filter(published_at__isnull=True).update(published_at=timezone.now())
+        invalidate_queryset(queryset)
+        updated = queryset.update(status='published', updated_at=timezone.now())
+        refresh_counts_for_posts(queryset)
         self.message_user(request, f'{updated} posts marked as published.')
     make_published.short_description = 'Mark selected posts as published'
     
     def make_draft(self, request, queryset):
-        updated = queryset.update(status='draft')
+        invalidate_queryset(queryset)
+        updated = queryset.update(status='draft', updated_at=timezone.now())
+        refresh_counts_for_posts(queryset)
         self.message_user(request, f'{updated} posts marked as draft.')
     make_draft.short_description = 'Mark selected posts as draft'
     
     def make_archived(self, request, queryset):
-        updated = queryset.update(status='archived')
+        invalidate_queryset(queryset)
+        updated = queryset.update(status='archived', updated_at=timezone.now())
+        refresh_counts_for_posts(queryset)
         self.message_user(request, f'{updated} posts marked as archived.')
     make_archived.short_description = 'Mark selected posts as archived'
 
@@ -153,10 +163,12 @@ class CommentAdmin(admin.ModelAdmin):
     
     def approve_comments(self, request, queryset):
         updated = queryset.update(is_approved=True)
+        invalidate_comment_trees(queryset.values_list('post_id', flat=True))
         self.message_user(request, f'{updated} comments approved.')
     approve_comments.short_description = 'Approve selected comments'
     
     def unapprove_comments(self, request, queryset):
         updated = queryset.update(is_approved=False)
+        invalidate_comment_trees(queryset.values_list('post_id', flat=True))
         self.message_user(request, f'{updated} comments unapproved.')
     unapprove_comments.short_description = 'Unapprove selected comments'
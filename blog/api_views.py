@@ -1,24 +1,41 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django_filters import rest_framework as django_filters
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Post, Category
-from .serializers import PostSerializer, CategorySerializer
+from .serializers import PostSerializer, PostListSerializer, CategorySerializer
+from .search import PostSearchFilter
+from portfolio_blog.conditional import ConditionalGetViewSetMixin
+from portfolio_blog.fieldsets import SparseFieldsetsMixin
+from portfolio_blog.pagination import KeysetPagination
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostFilter(django_filters.FilterSet):
+    """Filters for the posts API (TaggableManager needs an explicit filter)"""
+    tags = django_filters.CharFilter(field_name='tags__slug')
+
+    class Meta:
+        model = Post
+        fields = ['category', 'tags']
+
+
+class PostViewSet(ConditionalGetViewSetMixin, SparseFieldsetsMixin, viewsets.ModelViewSet):
     """API viewset for blog posts"""
     queryset = Post.objects.filter(status='published').select_related('category', 'author').prefetch_related('tags')
     serializer_class = PostSerializer
+    list_serializer_class = PostListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'tags']
-    search_fields = ['title', 'excerpt', 'content']
+    pagination_class = KeysetPagination
+    keyset_ordering = ['-published_at', '-id']
+    validator_fields = ('updated_at', 'published_at')
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
+    filterset_class = PostFilter
     ordering_fields = ['created_at', 'views_count']
     ordering = ['-created_at']
     lookup_field = 'slug'
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """API viewset for blog categories"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -0,0 +1,115 @@
+"""
+Threaded comments.
+
+Every comment stores a materialized ``thread_path`` (its ancestors' ids and
+its own, zero padded), so ordering a post's comments by path yields each
+thread depth-first. ``load_comment_tree`` fetches all approved comments of
+a post with one query, nests them in memory and caches the result until a
+comment of that post is added, edited, (un)approved or deleted.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+from rest_framework import serializers
+
+CACHE_KEY = 'blog:comments:{}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+PATH_WIDTH = 10
+PATH_SEPARATOR = '/'
+
+
+def _comment_model():
+    from .models import Comment
+    return Comment
+
+
+def build_thread_path(comment, parent_path=''):
+    return f'{parent_path}{comment.pk:0{PATH_WIDTH}d}{PATH_SEPARATOR}'
+
+
+def update_thread_path(comment):
+    """Store ``comment``'s path, moving its descendants along if it changed"""
+    Comment = _comment_model()
+    parent_path = ''
+    if comment.parent_id:
+        parent_path = Comment.objects.filter(pk=comment.parent_id).values_list('thread_path', flat=True).first() or ''
+    path = build_thread_path(comment, parent_path)
+    if path == comment.thread_path:
+        return
+
+    old_path, comment.thread_path = comment.thread_path, path
+    with transaction.atomic():
+        Comment.objects.filter(pk=comment.pk).update(thread_path=path)
+        if old_path:
+            # Re-parented: rewrite the prefix of the whole subtree
+            Comment.objects.filter(thread_path__startswith=old_path).exclude(pk=comment.pk).update(
+                thread_path=Concat(Value(path), Substr('thread_path', len(old_path) + 1))
+            )
+
+
+def comment_node(comment):
+    """Cacheable representation of a comment (same keys as CommentSerializer)"""
+    return {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author_name': comment.author_name,
+        'author_email': comment.author_email,
+        'content': comment.content,
+        'created_at': serializers.DateTimeField().to_representation(comment.created_at),
+        'is_approved': comment.is_approved,
+        'parent': comment.parent_id,
+        'replies': [],
+    }
+
+
+def build_tree(comments):
+    """Nest comments ordered by ``thread_path`` into a list of root nodes.
+
+    Replies whose parent is not in ``comments`` (e.g. not approved) are
+    left out together with their own replies.
+    """
+    nodes = {}
+    roots = []
+    for comment in comments:
+        node = comment_node(comment)
+        if comment.parent_id is None:
+            roots.append(node)
+        elif comment.parent_id in nodes:
+            nodes[comment.parent_id]['replies'].append(node)
+        else:
+            continue
+        nodes[comment.pk] = node
+    return roots
+
+
+def load_comment_tree(post_id):
+    """Approved comments of a post as nested nodes, from cache or one query"""
+    key = CACHE_KEY.format(post_id)
+    tree = cache.get(key)
+    if tree is None:
+        Comment = _comment_model()
+        comments = Comment.objects.filter(post_id=post_id, is_approved=True).order_by('thread_path')
+        tree = build_tree(comments)
+        cache.set(key, tree, CACHE_TIMEOUT)
+    return tree
+
+
+def index_tree(tree):
+    """Map node id -> node for every node in ``tree``"""
+    index = {}
+    stack = list(tree)
+    while stack:
+        node = stack.pop()
+        index[node['id']] = node
+        stack.extend(node['replies'])
+    return index
+
+
+def invalidate_comment_trees(post_ids):
+    post_ids = set(post_ids)
+    if post_ids:
+        transaction.on_commit(lambda: cache.delete_many([CACHE_KEY.format(pk) for pk in post_ids]))
+
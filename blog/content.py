@@ -0,0 +1,282 @@
+"""
+Save-time processing of post bodies.
+
+``process_content`` runs the CKEditor HTML through a single parsing pass and
+returns the artifacts stored on ``Post``: cleaned HTML, plain text, word
+count, reading time and a heading outline. Images get ``loading``,
+``decoding`` and, when ``image_info`` knows the file (see blog.images),
+``width``/``height`` and a ``srcset`` of its stored variants. ``Post.save`` only calls it when
+``content_hash`` changes, so unchanged posts are never reprocessed. Bump
+``PIPELINE_VERSION`` when the output format changes to reprocess everything
+on the next save (or with ``process_post_content --force``).
+
+Sanitizing works from allow-lists: tags outside ``ALLOWED_TAGS`` are
+dropped (their text is kept), attributes outside ``ALLOWED_ATTRS``,
+URLs outside ``ALLOWED_SCHEMES`` and inline styles outside
+``ALLOWED_STYLES`` are removed. Iframes are kept only for the https hosts
+in the ``BLOG_IFRAME_HOSTS`` setting; run ``process_post_content --force``
+after changing it.
+"""
+
+import hashlib
+import re
+from collections import namedtuple
+from html import escape
+from html.parser import HTMLParser
+
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.utils.text import slugify
+
+PIPELINE_VERSION = 3
+
+WORDS_PER_MINUTE = 200
+
+# Dropped together with everything inside them
+DROP_WITH_CONTENT = {'script', 'style', 'noscript', 'template', 'svg', 'math', 'textarea', 'select', 'title'}
+# Everything else outside this list is dropped, but its text content is kept
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'cite', 'code', 'col', 'colgroup',
+    'dd', 'del', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'hr', 'i', 'iframe', 'img', 'ins', 'kbd', 'li', 'mark', 'ol', 'p', 'pre',
+    'q', 's', 'samp', 'small', 'span', 'strike', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+GLOBAL_ATTRS = {'class', 'id', 'title', 'lang', 'dir', 'style'}
+ALLOWED_ATTRS = {
+    'a': {'href', 'name', 'target', 'rel'},
+    'blockquote': {'cite'},
+    'q': {'cite'},
+    'col': {'span', 'width'},
+    'colgroup': {'span', 'width'},
+    'iframe': {'src', 'width', 'height', 'allow', 'allowfullscreen', 'frameborder', 'loading'},
+    'img': {'src', 'alt', 'width', 'height', 'srcset', 'sizes', 'loading', 'decoding'},
+    'li': {'value'},
+    'ol': {'start', 'type', 'reversed'},
+    'table': {'border', 'cellpadding', 'cellspacing', 'summary', 'width'},
+    'td': {'colspan', 'rowspan', 'align', 'valign', 'width'},
+    'th': {'colspan', 'rowspan', 'scope', 'align', 'valign', 'width'},
+}
+URL_ATTRS = {'href', 'src', 'cite'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto', 'tel'}
+# Inline styles CKEditor's alignment, colour, font and image tools write
+ALLOWED_STYLES = {
+    'background-color', 'border', 'border-style', 'border-width', 'color', 'float',
+    'font-family', 'font-size', 'font-style', 'font-weight', 'height', 'list-style-type',
+    'margin', 'margin-bottom', 'margin-left', 'margin-right', 'margin-top', 'text-align',
+    'text-decoration', 'vertical-align', 'width',
+}
+STYLE_VALUE_RE = re.compile(r"^(?:[#\w\s.,%'\"-]+|rgba?\([\d\s.,%]+\))$")
+DEFAULT_IFRAME_HOSTS = ('www.youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com')
+VOID_TAGS = {'area', 'br', 'col', 'hr', 'img', 'source', 'track', 'wbr'}
+BLOCK_TAGS = {
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'pre', 'table', 'tr', 'td', 'th', 'figure', 'figcaption', 'hr',
+}
+OUTLINE_TAGS = {'h2': 2, 'h3': 3, 'h4': 4}
+# Rendered width of the post body (max-w-4xl minus its padding)
+IMAGE_SIZES = '(min-width: 896px) 832px, 100vw'
+
+ContentArtifacts = namedtuple(
+    'ContentArtifacts',
+    ['html', 'text', 'word_count', 'reading_time', 'outline']
+)
+
+
+def content_hash(content):
+    """Hash of the raw content and the pipeline version"""
+    data = f'{PIPELINE_VERSION}:{content or ""}'.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def _is_safe_url(name, value):
+    compact = re.sub(r'[\s\x00-\x1f]+', '', value or '').lower()
+    scheme = re.match(r'^([a-z][a-z0-9+.-]*):', compact)
+    if scheme is None or scheme[1] in ALLOWED_SCHEMES:
+        # Relative URLs have no scheme
+        return True
+    # Inline images are harmless
+    return name == 'src' and compact.startswith('data:image/')
+
+
+def _clean_style(value):
+    declarations = []
+    for declaration in (value or '').split(';'):
+        prop, _, val = declaration.partition(':')
+        prop, val = prop.strip().lower(), val.strip()
+        if prop in ALLOWED_STYLES and val and STYLE_VALUE_RE.match(val):
+            declarations.append(f'{prop}: {val}')
+    return '; '.join(declarations)
+
+
+def iframe_hosts():
+    return set(getattr(settings, 'BLOG_IFRAME_HOSTS', DEFAULT_IFRAME_HOSTS))
+
+
+def _is_allowed_iframe(src, hosts):
+    url = urlparse((src or '').strip())
+    return url.scheme == 'https' and url.hostname in hosts
+
+
+class ContentProcessor(HTMLParser):
+    """Single pass over the HTML that sanitizes it and collects text/outline"""
+
+    def __init__(self, image_info=None):
+        super().__init__(convert_charrefs=True)
+        self.image_info = image_info
+        self.images = 0
+        self.output = []
+        self.text = []
+        self.outline = []
+        self._skip_depth = 0
+        self._heading = None
+        self._ids = set()
+        self._iframe_hosts = iframe_hosts()
+
+    # Tags
+
+    def clean_attrs(self, tag, attrs):
+        allowed = GLOBAL_ATTRS | ALLOWED_ATTRS.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed:
+                continue
+            if name in URL_ATTRS and not _is_safe_url(name, value):
+                continue
+            if name == 'style':
+                value = _clean_style(value)
+                if not value:
+                    continue
+            cleaned.append((name, value))
+        return cleaned
+
+    def drops_content(self, tag, attrs):
+        """Whether ``tag`` goes away together with what is inside it"""
+        if tag == 'iframe':
+            return not _is_allowed_iframe(dict(attrs).get('src'), self._iframe_hosts)
+        return tag in DROP_WITH_CONTENT
+
+    def image_attrs(self, attrs):
+        """Add lazy loading, intrinsic size and srcset to an <img>"""
+        present = {name for name, _ in attrs}
+        attrs = list(attrs)
+        self.images += 1
+        # The first image may be above the fold; let the browser fetch it eagerly
+        if self.images > 1 and 'loading' not in present:
+            attrs.append(('loading', 'lazy'))
+        if 'decoding' not in present:
+            attrs.append(('decoding', 'async'))
+
+        src = dict(attrs).get('src')
+        info = self.image_info(src) if self.image_info and src else None
+        if info is None or not info.width or not info.height:
+            return attrs
+        if 'width' not in present and 'height' not in present:
+            attrs += [('width', str(info.width)), ('height', str(info.height))]
+        if info.variants and 'srcset' not in present:
+            candidates = [f"{variant['url']} {variant['width']}w" for variant in info.variants]
+            attrs.append(('srcset', ', '.join(candidates + [f'{src} {info.width}w'])))
+            if 'sizes' not in present:
+                attrs.append(('sizes', IMAGE_SIZES))
+        return attrs
+
+    def render_tag(self, tag, attrs, close=False):
+        parts = [tag]
+        for name, value in attrs:
+            parts.append(name if value is None else f'{name}="{escape(value)}"')
+        return f'<{" ".join(parts)}{" /" if close else ""}>'
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_depth:
+            if tag in DROP_WITH_CONTENT or tag == 'iframe':
+                self._skip_depth += 1
+            return
+        if self.drops_content(tag, attrs):
+            self._skip_depth = 1
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attrs = self.clean_attrs(tag, attrs)
+        if tag == 'img':
+            attrs = self.image_attrs(attrs)
+        if tag in OUTLINE_TAGS and self._heading is None:
+            self._heading = {'tag': tag, 'attrs': attrs, 'index': len(self.output), 'text': []}
+        self.output.append(self.render_tag(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        if self._skip_depth or self.drops_content(tag, attrs) or tag not in ALLOWED_TAGS:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        attrs = self.clean_attrs(tag, attrs)
+        if tag == 'img':
+            attrs = self.image_attrs(attrs)
+        self.output.append(self.render_tag(tag, attrs, close=True))
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            if tag in DROP_WITH_CONTENT or tag == 'iframe':
+                self._skip_depth -= 1
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in ALLOWED_TAGS or tag in VOID_TAGS:
+            return
+        if self._heading is not None and tag == self._heading['tag']:
+            self.finish_heading()
+        self.output.append(f'</{tag}>')
+
+    def finish_heading(self):
+        heading, self._heading = self._heading, None
+        title = re.sub(r'\s+', ' ', ''.join(heading['text'])).strip()
+        if not title:
+            return
+        attrs = dict(heading['attrs'])
+        anchor = attrs.get('id')
+        if not anchor:
+            base = slugify(title) or 'section'
+            anchor, counter = base, 1
+            while anchor in self._ids:
+                counter += 1
+                anchor = f'{base}-{counter}'
+            # Give the heading an id so the outline can link to it
+            self.output[heading['index']] = self.render_tag(heading['tag'], heading['attrs'] + [('id', anchor)])
+        self._ids.add(anchor)
+        self.outline.append({'level': OUTLINE_TAGS[heading['tag']], 'id': anchor, 'title': title})
+
+    # Text
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.output.append(escape(data, quote=False))
+        self.text.append(data)
+        if self._heading is not None:
+            self._heading['text'].append(data)
+
+    def handle_comment(self, data):
+        # CKEditor leaves conditional comments behind; none are needed
+        pass
+
+    def result(self):
+        self.close()
+        return ''.join(self.output), re.sub(r'\s+', ' ', ''.join(self.text)).strip()
+
+
+def process_content(content, image_info=None):
+    """Return the ContentArtifacts derived from a post body.
+
+    ``image_info(src)`` returns an object with ``width``, ``height`` and
+    ``variants`` for an image URL, or None when it's unknown.
+    """
+    processor = ContentProcessor(image_info)
+    processor.feed(content or '')
+    html, text = processor.result()
+    word_count = len(text.split())
+    reading_time = max(1, word_count // WORDS_PER_MINUTE) if word_count else 0
+    return ContentArtifacts(html, text, word_count, reading_time, processor.outline)
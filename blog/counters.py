@@ -0,0 +1,313 @@
+"""
+Denormalized counters for the blog.
+
+- Write-behind view counter: reads never touch the ``blog_post`` row. Every
+  hit increments a buffered counter (atomic ``incr`` in the shared cache, or
+  an in-process dict when the configured cache cannot do atomic increments
+  cheaply) and a periodic flusher applies the accumulated deltas with bulk
+  ``F()`` updates. ``views_count`` is therefore eventually consistent.
+  Each process also flushes what it has buffered when it exits, and
+  shared-cache counters expire if nothing flushes them for
+  ``PENDING_TIMEOUT``.
+- Published post counts per category and per tag, recomputed for the
+  affected rows whenever a post's status, category or tags change.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from taggit.models import TaggedItem
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'blog:views:pending:{}'
+# Far longer than any flush interval; renewed whenever a key is flushed
+PENDING_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class LocalCounterStore:
+    """In-process counter buffer used when the cache is not suitable"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, post_id):
+        with self._lock:
+            self._counts[post_id] += 1
+            return self._counts[post_id]
+
+    def pending(self, post_id):
+        return self._counts.get(post_id, 0)
+
+    def take(self, post_ids):
+        """Remove and return the buffered counts for ``post_ids``"""
+        with self._lock:
+            return {pk: self._counts.pop(pk) for pk in post_ids if self._counts.get(pk)}
+
+    def restore(self, counts):
+        with self._lock:
+            self._counts.update(counts)
+
+
+class CacheCounterStore:
+    """Counter buffer kept in the shared cache (atomic incr/decr)"""
+
+    def __init__(self, timeout=PENDING_TIMEOUT):
+        self.timeout = timeout
+
+    def incr(self, post_id):
+        key = PENDING_KEY.format(post_id)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Key does not exist yet; add() is atomic so only one worker wins
+            if cache.add(key, 1, timeout=self.timeout):
+                return 1
+            return cache.incr(key)
+
+    def pending(self, post_id):
+        return cache.get(PENDING_KEY.format(post_id)) or 0
+
+    def take(self, post_ids):
+        keys = {PENDING_KEY.format(pk): pk for pk in post_ids}
+        taken = {}
+        for key, count in cache.get_many(list(keys)).items():
+            if not count:
+                continue
+            try:
+                # Subtract what we read rather than deleting the key, so hits
+                # that land between the read and the decr are not lost.
+                cache.decr(key, count)
+            except ValueError:
+                continue
+            # incr/decr keep the expiry set by add(); push it back out
+            cache.touch(key, self.timeout)
+            taken[keys[key]] = count
+        return taken
+
+    def restore(self, counts):
+        for post_id, count in counts.items():
+            key = PENDING_KEY.format(post_id)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.add(key, count, timeout=self.timeout)
+
+
+class ViewCounter:
+    """Buffers post views and flushes them to the database in bulk"""
+
+    def __init__(self, store=None, flush_interval=None):
+        self._store = store
+        self._flush_interval = flush_interval
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._exit_flush_registered = False
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = self._default_store()
+        return self._store
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is None:
+            return getattr(settings, 'BLOG_VIEW_COUNT_FLUSH_INTERVAL', 60)
+        return self._flush_interval
+
+    @staticmethod
+    def _default_store():
+        backend = getattr(settings, 'BLOG_VIEW_COUNT_BUFFER', 'auto')
+        if backend == 'auto':
+            # Only Redis gives us cheap, cross-worker atomic increments. The
+            # database cache would turn every hit back into a row write.
+            cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            backend = 'cache' if 'redis' in cache_backend.lower() else 'local'
+        return CacheCounterStore() if backend == 'cache' else LocalCounterStore()
+
+    def record(self, post_id):
+        """Count a view and return the number of views not yet flushed"""
+        try:
+            pending = self.store.incr(post_id)
+        except Exception as e:
+            # Analytics must never break a page render
+            logger.warning("Could not buffer view for post %s: %s", post_id, e)
+            return 0
+
+        with self._dirty_lock:
+            self._dirty.add(post_id)
+            if not self._exit_flush_registered:
+                # Registered on first use, so in the worker, not a pre-fork parent
+                atexit.register(self.flush_at_exit)
+                self._exit_flush_registered = True
+
+        self.maybe_flush()
+        return pending
+
+    def pending(self, post_id):
+        try:
+            return self.store.pending(post_id)
+        except Exception:
+            return 0
+
+    def maybe_flush(self):
+        """Start a background flush if the interval has elapsed"""
+        if time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        if not self._flushing.acquire(blocking=False):
+            return
+        self._last_flush = time.monotonic()
+        thread = threading.Thread(target=self._background_flush, daemon=True)
+        thread.start()
+
+    def _background_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("View count flush failed: %s", e)
+        finally:
+            # This thread's connection is never reused by the request cycle
+            connections.close_all()
+            self._flushing.release()
+
+    def flush_at_exit(self):
+        """Flush what this process buffered; a local store dies with it"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("View count flush at exit failed: %s", e)
+
+    def flush(self, post_ids=None):
+        """Apply buffered views to ``Post.views_count``.
+
+        With no ``post_ids`` only the posts seen by this process are flushed.
+        Returns the total number of views written.
+        """
+        from .models import Post
+
+        if post_ids is None:
+            with self._dirty_lock:
+                post_ids, self._dirty = self._dirty, set()
+
+        counts = self.store.take(post_ids)
+        if not counts:
+            return 0
+
+        # One UPDATE per distinct increment instead of one per post
+        by_delta = defaultdict(list)
+        for post_id, count in counts.items():
+            by_delta[count].append(post_id)
+
+        try:
+            with transaction.atomic():
+                for delta, ids in by_delta.items():
+                    Post.objects.filter(pk__in=ids).update(views_count=F('views_count') + delta)
+        except Exception:
+            # Put the counts back so the next flush can retry them
+            self.store.restore(counts)
+            with self._dirty_lock:
+                self._dirty.update(counts)
+            raise
+
+        return sum(counts.values())
+
+
+view_counter = ViewCounter()
+
+
+def record_view(post_id):
+    """Page cache hit action (see portfolio_blog.page_cache.on_hit)"""
+    return view_counter.record(post_id)
+
+
+def refresh_category_counts(category_ids):
+    """Recompute ``published_posts_count`` for the given categories"""
+    from .models import Category, Post
+
+    category_ids = {pk for pk in category_ids if pk}
+    if not category_ids:
+        return
+    published = (
+        Post.objects.filter(category=OuterRef('pk'), status='published')
+        .order_by()
+        .values('category')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Category.objects.filter(pk__in=category_ids).update(
+        published_posts_count=Coalesce(Subquery(published), 0)
+    )
+
+
+def refresh_tag_counts(tag_ids):
+    """Recompute the published post count stored in ``TagStat`` for the given tags"""
+    from .models import Post, TagStat
+
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return
+    content_type = ContentType.objects.get_for_model(Post)
+    counts = dict(
+        TaggedItem.objects.filter(
+            tag_id__in=tag_ids,
+            content_type=content_type,
+            object_id__in=Post.objects.filter(status='published').values('pk'),
+        )
+        .order_by()
+        .values_list('tag_id')
+        .annotate(total=Count('id'))
+    )
+    TagStat.objects.bulk_create(
+        [TagStat(tag_id=pk, published_posts_count=counts.get(pk, 0)) for pk in tag_ids],
+        update_conflicts=True,
+        unique_fields=['tag'],
+        update_fields=['published_posts_count'],
+    )
+
+
+def post_tag_ids(post_ids):
+    content_type = ContentType.objects.get_for_model(_post_model())
+    return set(
+        TaggedItem.objects.filter(content_type=content_type, object_id__in=post_ids)
+        .values_list('tag_id', flat=True)
+    )
+
+
+def refresh_counts_for_posts(posts):
+    """Refresh category and tag counts touched by ``posts`` (a queryset).
+
+    Use after ``QuerySet.update()``, which bypasses the model signals.
+    """
+    rows = list(posts.values_list('pk', 'category_id'))
+    refresh_category_counts(category_id for _, category_id in rows)
+    refresh_tag_counts(post_tag_ids([pk for pk, _ in rows]))
+
+
+def rebuild_all_counts():
+    """Recompute every category and tag counter"""
+    from .models import Category, TagStat
+
+    refresh_category_counts(Category.objects.values_list('pk', flat=True))
+    content_type = ContentType.objects.get_for_model(_post_model())
+    tag_ids = set(TaggedItem.objects.filter(content_type=content_type).values_list('tag_id', flat=True))
+    # Tags that lost all their posts still have a stale TagStat row
+    tag_ids.update(TagStat.objects.values_list('pk', flat=True))
+    refresh_tag_counts(tag_ids)
+
+
+def _post_model():
+    from .models import Post
+    return Post
@@ -0,0 +1,137 @@
+"""
+Sizes and responsive variants of images embedded in post bodies.
+
+``image_info`` is the lookup ``blog.content`` uses while a post is saved.
+The first time a URL shows up it is measured and stored as a
+``ContentImage``; later saves read the row.
+
+- Media files on the default storage are measured with Pillow. Narrower
+  copies (``VARIANT_WIDTHS``) are written next to the original.
+- Images in this site's Cloudinary account are measured from the first
+  bytes of the file. Their variants are URL transformations, so nothing
+  extra is stored.
+- Any other URL is never fetched. A post body is author input, and
+  fetching arbitrary hosts from the server would let it probe internal
+  addresses.
+
+An image that can't be measured is stored without a size, so later saves
+don't wait on it again. To retry, delete its ``ContentImage`` row and run
+``process_post_content --force``. The post still saves, and its ``<img>``
+just gets the lazy-loading attributes.
+"""
+
+import logging
+import os
+import re
+from io import BytesIO
+from urllib.parse import unquote, urlparse
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+from PIL import Image, ImageFile
+
+from .models import ContentImage
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (480, 800, 1200)
+MEASURE_TIMEOUT = 5
+MAX_HEADER_BYTES = 1024 * 1024
+CLOUDINARY_UPLOAD_RE = re.compile(r'^(https://res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/)(.+)$')
+VARIANT_FORMATS = {'JPEG': {'quality': 85, 'optimize': True}, 'PNG': {'optimize': True}, 'WEBP': {'quality': 80}}
+
+
+def image_info(src):
+    """The ``ContentImage`` for ``src``, measured on first use; None for other hosts"""
+    if not src or not (media_name(src) or cloudinary_match(src)):
+        return None
+    image = ContentImage.objects.filter(url=src).first()
+    if image is not None:
+        return image
+    image = ContentImage(url=src)
+    try:
+        measure(image)
+    except Exception as e:
+        logger.warning("Could not measure content image %s: %s", src, e)
+    try:
+        image.save()
+    except IntegrityError:
+        # Measured concurrently by another save
+        return ContentImage.objects.filter(url=src).first()
+    return image
+
+
+def measure(image):
+    name = media_name(image.url)
+    if name is not None:
+        measure_media(image, name)
+        return
+    match = cloudinary_match(image.url)
+    if match:
+        image.width, image.height = remote_size(image.url)
+        image.variants = [
+            {'width': width, 'url': f'{match[1]}w_{width},c_limit,f_auto,q_auto/{match[3]}'}
+            for width in VARIANT_WIDTHS if width < image.width
+        ]
+
+
+def cloudinary_match(url):
+    """Match of an upload URL in this site's Cloudinary account, or None"""
+    cloud_name = getattr(settings, 'CLOUDINARY_STORAGE', {}).get('CLOUD_NAME')
+    match = CLOUDINARY_UPLOAD_RE.match(url)
+    if not cloud_name or not match or match['cloud'] != cloud_name:
+        return None
+    return match
+
+
+def media_name(url):
+    """Storage name of a media URL on this site, or None"""
+    path = urlparse(url).path
+    if not settings.MEDIA_URL.startswith('/') or not path.startswith(settings.MEDIA_URL):
+        return None
+    name = unquote(path[len(settings.MEDIA_URL):])
+    return name if default_storage.exists(name) else None
+
+
+def measure_media(image, name):
+    with default_storage.open(name) as f:
+        with Image.open(f) as original:
+            image.width, image.height = original.size
+            if original.format not in VARIANT_FORMATS or getattr(original, 'is_animated', False):
+                return
+            original.load()
+            image.variants = [
+                {'width': width, 'url': default_storage.url(save_variant(original, name, width))}
+                for width in VARIANT_WIDTHS if width < image.width
+            ]
+
+
+def save_variant(original, name, width):
+    root, ext = os.path.splitext(name)
+    variant_name = f'{root}-{width}w{ext}'
+    if default_storage.exists(variant_name):
+        return variant_name
+    variant = original.copy()
+    variant.thumbnail((width, original.height), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    variant.save(buffer, original.format, **VARIANT_FORMATS[original.format])
+    return default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+
+
+def remote_size(url):
+    """Width and height of a remote image, reading only as much as the header needs"""
+    parser = ImageFile.Parser()
+    read = 0
+    with requests.get(url, stream=True, timeout=MEASURE_TIMEOUT, allow_redirects=False) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(16 * 1024):
+            parser.feed(chunk)
+            read += len(chunk)
+            if parser.image is not None:
+                return parser.image.size
+            if read >= MAX_HEADER_BYTES:
+                break
+    raise ValueError('no image header found')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from blog.models import Post
+from blog.counters import LocalCounterStore, view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply buffered post views to Post.views_count (run periodically, e.g. from Heroku Scheduler). '
+        'Only works with the shared-cache buffer (Redis); with the in-process buffer each web '
+        'process flushes its own views.'
+    )
+
+    def handle(self, *args, **options):
+        # The in-process buffer lives in the web workers, so this process
+        # would find it empty and report a flush that never happened.
+        if isinstance(view_counter.store, LocalCounterStore):
+            raise CommandError(
+                'Views are buffered in each web process (no Redis cache is configured), '
+                'so there is nothing to flush from here. Set BLOG_VIEW_COUNT_BUFFER to "cache" '
+                'with a Redis cache to use this command.'
+            )
+        # The shared buffer can hold views for any post, not just the ones
+        # this process has seen, so sweep every post id.
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        flushed = view_counter.flush(post_ids)
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} buffered views'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from blog import search
+from blog.models import CONTENT_ARTIFACT_FIELDS, Post
+from portfolio.signals import invalidate_queryset
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the stored HTML, text, reading time and outline of posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Reprocess every post, even if its content has not changed',
+        )
+
+    def handle(self, *args, **options):
+        processed = []
+        for post in Post.objects.iterator(chunk_size=100):
+            if options['force']:
+                post.content_hash = ''
+            if post.process_content():
+                Post.objects.filter(pk=post.pk).update(
+                    **{field: getattr(post, field) for field in CONTENT_ARTIFACT_FIELDS}
+                )
+                # The search document is built from content_text
+                search.index_post(post)
+                processed.append(post.pk)
+        # .update() sends no signals; purge the pages showing the old body
+        invalidate_queryset(Post.objects.filter(pk__in=processed))
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(processed)} posts'))
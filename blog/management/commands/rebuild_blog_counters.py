@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from blog.counters import rebuild_all_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the published post counters for all categories and tags'
+
+    def handle(self, *args, **options):
+        rebuild_all_counts()
+        self.stdout.write(self.style.SUCCESS('Blog counters rebuilt'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post
+from blog.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-posts index for all blog posts'
+
+    def handle(self, *args, **options):
+        count = rebuild_all(Post.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt related posts for {count} posts'))
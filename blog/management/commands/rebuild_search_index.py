@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents and index for all blog posts'
+
+    def handle(self, *args, **options):
+        count = rebuild_index(Post.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} posts'))
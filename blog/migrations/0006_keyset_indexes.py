@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-18 04:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_backfill_published_at"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="post",
+            name="blog_post_status_615533_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="blog_post_categor_cb6e5f_idx",
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["status", "-published_at", "-id"],
+                name="blog_post_status_258d5d_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["category", "-published_at", "-id"],
+                name="blog_post_categor_84f854_idx",
+            ),
+        ),
+    ]
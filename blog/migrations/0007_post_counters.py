@@ -0,0 +1,77 @@
+# Generated by Django 5.1.1 on 2026-10-18 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    Post = apps.get_model('blog', 'Post')
+    TagStat = apps.get_model('blog', 'TagStat')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    published = Post.objects.filter(status='published')
+    for row in published.values('category').annotate(total=Count('pk')):
+        if row['category']:
+            Category.objects.filter(pk=row['category']).update(published_posts_count=row['total'])
+
+    content_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if content_type is None:
+        return
+    tag_counts = (
+        TaggedItem.objects.filter(content_type=content_type, object_id__in=published.values('pk'))
+        .values('tag')
+        .annotate(total=Count('id'))
+    )
+    TagStat.objects.bulk_create([
+        TagStat(tag_id=row['tag'], published_posts_count=row['total']) for row in tag_counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_keyset_indexes"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="published_posts_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, help_text="Maintained by blog.counters"
+            ),
+        ),
+        migrations.CreateModel(
+            name="TagStat",
+            fields=[
+                (
+                    "tag",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="blog_stats",
+                        serialize=False,
+                        to="taggit.tag",
+                    ),
+                ),
+                ("published_posts_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-published_posts_count"],
+                        name="blog_tagsta_publish_7ee049_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
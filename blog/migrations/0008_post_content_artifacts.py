@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+# Existing posts keep a blank content_hash, so the release phase's
+# process_post_content generates their artifacts with the current pipeline.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_post_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="content_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="content_html",
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                help_text="Sanitized HTML rendered by templates",
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="content_outline",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="content_text",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
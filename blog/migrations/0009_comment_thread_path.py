@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+def populate_thread_paths(apps, schema_editor):
+    # Frozen copy of the path format at the time of this migration (ten
+    # digit zero-padded ids, each followed by "/"); it must not follow
+    # later changes to blog.comments.
+    Comment = apps.get_model('blog', 'Comment')
+    parents = dict(Comment.objects.values_list('pk', 'parent_id'))
+    paths = {}
+    for pk in parents:
+        chain = []
+        node = pk
+        while node in parents and node not in paths:
+            chain.append(node)
+            node = parents.get(node)
+        path = paths.get(node, '')
+        for node in reversed(chain):
+            path = f'{path}{node:010d}/'
+            paths[node] = path
+    Comment.objects.bulk_update(
+        [Comment(pk=pk, thread_path=path) for pk, path in paths.items()],
+        ['thread_path'], batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_post_content_artifacts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="thread_path",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Materialized path of ancestor ids (see blog.comments)",
+                max_length=512,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "is_approved", "thread_path"],
+                name="blog_commen_post_id_aee540_idx",
+            ),
+        ),
+        migrations.RunPython(populate_thread_paths, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,35 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
+from django.contrib.postgres.search import SearchVectorField
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 from ckeditor_uploader.fields import RichTextUploadingField
 from PIL import Image
 import os
 
+from portfolio_blog.slugs import save_with_unique_slug
+
+from .comments import update_thread_path
+from .content import content_hash, process_content
+
+CONTENT_ARTIFACT_FIELDS = [
+    'content_html', 'content_text', 'word_count', 'reading_time', 'content_outline', 'content_hash',
+]
+
 
 class Category(models.Model):
     """Blog post categories"""
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(max_length=255, blank=True)
+    published_posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Maintained by blog.counters"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -47,6 +64,13 @@ class Post(models.Model):
     
     # Content
     content = RichTextUploadingField()
+
+    # Derived from content at save time (see blog.content)
+    content_html = models.TextField(blank=True, editable=False, help_text="Sanitized HTML rendered by templates")
+    content_text = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    content_outline = models.JSONField(default=list, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     # Media
     featured_image = models.ImageField(
@@ -96,8 +120,8 @@ class Post(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status', '-published_at']),
-            models.Index(fields=['category', '-published_at']),
+            models.Index(fields=['status', '-published_at', '-id']),
+            models.Index(fields=['category', '-published_at', '-id']),
             models.Index(fields=['slug']),
         ]
 
@@ -105,22 +129,21 @@ class Post(models.Model):
         return self.title
 
     def save(self, *args, **kwargs):
-        # Auto-generate slug if not provided
-        if not self.slug:
-            self.slug = slugify(self.title)
-            
-        # Ensure slug is unique
-        original_slug = self.slug
-        counter = 1
-        while Post.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-            self.slug = f"{original_slug}-{counter}"
-            counter += 1
-            
         # Auto-generate meta description from excerpt if not provided
         if not self.meta_description and self.excerpt:
             self.meta_description = self.excerpt[:160]
-            
-        super().save(*args, **kwargs)
+
+        # Listings and cursors are keyed on published_at, so it must be set
+        if self.status == 'published' and not self.published_at:
+            self.published_at = timezone.now()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            if self.process_content() and update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(CONTENT_ARTIFACT_FIELDS)
+
+        # Auto-generate a unique slug (or de-duplicate the one provided)
+        save_with_unique_slug(self, super().save, self.title, *args, **kwargs)
         
         # Optimize image if uploaded
         if self.featured_image:
@@ -146,22 +169,112 @@ class Post(models.Model):
             print(f"Error optimizing blog image: {e}")
             pass
 
+    def process_content(self):
+        """Refresh the stored content artifacts if the content changed.
+
+        Returns True when the artifacts were regenerated.
+        """
+        digest = content_hash(self.content)
+        if digest == self.content_hash:
+            return False
+        from .images import image_info
+
+        artifacts = process_content(self.content, image_info=image_info)
+        self.content_html = artifacts.html
+        self.content_text = artifacts.text
+        self.word_count = artifacts.word_count
+        self.reading_time = artifacts.reading_time
+        self.content_outline = artifacts.outline
+        self.content_hash = digest
+        return True
+
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
 
     def get_reading_time(self):
-        """Calculate estimated reading time"""
-        if self.content:
-            word_count = len(self.content.split())
-            reading_time = max(1, word_count // 200)  # Average 200 words per minute
-            return reading_time
-        return 0
+        """Estimated reading time, computed when the content was saved"""
+        return self.reading_time
 
     @property
     def is_published(self):
         return self.status == 'published'
 
 
+class TagStat(models.Model):
+    """Denormalized per-tag post count for tag clouds (see blog.counters)"""
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='blog_stats')
+    published_posts_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-published_posts_count']),
+        ]
+
+    def __str__(self):
+        return f'{self.tag}: {self.published_posts_count} posts'
+
+
+class PostSearchDocument(models.Model):
+    """Denormalized search document kept in sync with each post.
+
+    Postgres indexes ``search_vector`` with GIN; SQLite mirrors the text
+    columns into an FTS5 table (see blog.search).
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    title = models.CharField(max_length=200)
+    excerpt = models.TextField(blank=True)
+    body = models.TextField(blank=True, help_text="Plain text of the post content")
+    tags = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Search document for {self.title}'
+
+
+class RelatedPost(models.Model):
+    """Precomputed related posts, scored by shared tags, category and recency.
+
+    Rebuilt incrementally by blog.related when a post changes.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='unique_related_post'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.related_id} related to {self.post_id} ({self.score:.2f})'
+
+
+class ContentImage(models.Model):
+    """Intrinsic size and narrower variants of an image used in a post body.
+
+    Filled in by blog.images the first time a saved post references the
+    URL; ``variants`` is a list of ``{"width": ..., "url": ...}``.
+    """
+    url = models.CharField(max_length=500, unique=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    variants = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.url} ({self.width}x{self.height})'
+
+
 class Comment(models.Model):
     """Blog post comments (for future implementation)"""
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -171,9 +284,22 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_approved = models.BooleanField(default=False)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    thread_path = models.CharField(
+        max_length=512,
+        blank=True,
+        editable=False,
+        help_text="Materialized path of ancestor ids (see blog.comments)"
+    )
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'is_approved', 'thread_path']),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author_name} on {self.post.title}'
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_thread_path(self)
@@ -0,0 +1,143 @@
+"""
+Related-posts index.
+
+Scores are precomputed into ``RelatedPost`` rows so the detail page reads
+its related posts with one indexed lookup. A candidate's score is
+
+    (TAG_WEIGHT * shared_tags + CATEGORY_WEIGHT * same_category) * recency
+
+where ``recency`` decays with the candidate's age. Saving a post (or
+changing its tags) rebuilds its own list and the lists of the posts it
+could appear in; ``rebuild_related_posts`` recomputes everything.
+"""
+
+import threading
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from taggit.models import TaggedItem
+
+TAG_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.0
+RECENCY_DAYS = 90      # a candidate this old scores half as much as a new one
+RELATED_LIMIT = 6      # rows kept per post (the page shows 3)
+MAX_NEIGHBOURS = 20    # other posts refreshed when one post changes
+
+_pending = threading.local()
+
+
+def _post_model():
+    from .models import Post
+    return Post
+
+
+def score_candidates(post):
+    """Return ``{post_id: score}`` for every published post related to ``post``"""
+    Post = _post_model()
+    if post.status != 'published':
+        return {}
+
+    content_type = ContentType.objects.get_for_model(Post)
+    tagged = TaggedItem.objects.filter(content_type=content_type)
+    tag_ids = tagged.filter(object_id=post.pk).values_list('tag_id', flat=True)
+    shared_tags = dict(
+        tagged.filter(tag_id__in=tag_ids)
+        .exclude(object_id=post.pk)
+        .values_list('object_id')
+        .annotate(shared=Count('id'))
+    )
+
+    condition = Q(pk__in=shared_tags.keys())
+    if post.category_id:
+        condition |= Q(category_id=post.category_id)
+
+    now = timezone.now()
+    candidates = (
+        Post.objects.filter(condition, status='published')
+        .exclude(pk=post.pk)
+        .values_list('pk', 'category_id', 'published_at', 'created_at')
+    )
+
+    scores = {}
+    for pk, category_id, published_at, created_at in candidates:
+        relevance = TAG_WEIGHT * shared_tags.get(pk, 0)
+        if post.category_id and category_id == post.category_id:
+            relevance += CATEGORY_WEIGHT
+        age_days = max(0, (now - (published_at or created_at)).days)
+        scores[pk] = relevance / (1 + age_days / RECENCY_DAYS)
+    return scores
+
+
+def _top(scores, limit):
+    return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+def rebuild_for_post(post):
+    """Replace the stored related posts for ``post``; returns the full score map"""
+    from .models import RelatedPost
+
+    scores = score_candidates(post)
+    with transaction.atomic():
+        RelatedPost.objects.filter(post=post).delete()
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=post.pk, related_id=pk, score=score)
+            for pk, score in _top(scores, RELATED_LIMIT)
+        ])
+    return scores
+
+
+def update_related_posts(post):
+    """Rebuild ``post``'s list and the lists it may have entered or left"""
+    from .models import RelatedPost
+    Post = _post_model()
+
+    referrers = set(RelatedPost.objects.filter(related=post).values_list('post_id', flat=True))
+    scores = rebuild_for_post(post)
+    if post.status != 'published':
+        # Unpublished posts must not be suggested anywhere
+        RelatedPost.objects.filter(related=post).delete()
+
+    neighbour_ids = referrers | {pk for pk, _ in _top(scores, MAX_NEIGHBOURS)}
+    for neighbour in Post.objects.filter(pk__in=neighbour_ids):
+        rebuild_for_post(neighbour)
+
+
+def schedule_update(post):
+    """Update related posts once the current transaction commits.
+
+    Saving a post in the admin fires one post_save and several tag signals
+    in the same transaction; they collapse into a single rebuild. Each
+    signal queues a callback, and the first one to run after the commit
+    takes the post out of this thread's (this connection's) pending set.
+    The rest find it gone and do nothing. After a rollback the post just
+    stays pending until the next commit that touches it.
+    """
+    pending = getattr(_pending, 'posts', None)
+    if pending is None:
+        pending = _pending.posts = set()
+    pending.add(post.pk)
+
+    def run():
+        if post.pk not in pending:
+            return
+        pending.discard(post.pk)
+        Post = _post_model()
+        current = Post.objects.filter(pk=post.pk).first()
+        if current is not None:
+            update_related_posts(current)
+
+    transaction.on_commit(run)
+
+
+def rebuild_all(posts):
+    """Recompute related posts for every post in ``posts``; returns the count"""
+    from .models import RelatedPost
+
+    count = 0
+    RelatedPost.objects.exclude(related__status='published').delete()
+    for post in posts.iterator(chunk_size=100):
+        rebuild_for_post(post)
+        count += 1
+    return count
@@ -0,0 +1,231 @@
+"""
+Ranked full-text search for blog posts.
+
+Each post has a ``PostSearchDocument`` holding the plain text that is
+searched. The document is refreshed incrementally from signals
+(see blog.signals) and indexed per database vendor:
+
+- PostgreSQL: weighted ``tsvector`` in ``search_vector`` with a GIN index
+- SQLite: an FTS5 table (``blog_post_fts``) ranked with bm25
+- anything else: ``icontains`` on the document table (no joins, no DISTINCT)
+"""
+
+import html
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.html import strip_tags
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'blog_post_fts'
+
+# Upper bound on ranked ids pulled out of the FTS table per query
+MAX_RESULTS = 500
+
+# Column weights: title, tags, excerpt, body
+POSTGRES_WEIGHTS = (('title', 'A'), ('tags', 'B'), ('excerpt', 'C'), ('body', 'D'))
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+
+def html_to_text(value):
+    """Strip markup and entities from rich-text content"""
+    return re.sub(r'\s+', ' ', html.unescape(strip_tags(value or ''))).strip()
+
+
+class BasicSearchBackend:
+    """Portable fallback: substring match on the denormalized document"""
+
+    def index(self, document):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, queryset, query, rank=True):
+        condition = Q()
+        for term in query.split():
+            condition &= (
+                Q(search_document__title__icontains=term) |
+                Q(search_document__tags__icontains=term) |
+                Q(search_document__excerpt__icontains=term) |
+                Q(search_document__body__icontains=term)
+            )
+        return queryset.filter(condition)
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    """tsvector/GIN search ranked with ts_rank"""
+
+    @staticmethod
+    def vector():
+        vector = None
+        for field, weight in POSTGRES_WEIGHTS:
+            part = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+            vector = part if vector is None else vector + part
+        return vector
+
+    def index(self, document):
+        from .models import PostSearchDocument
+        PostSearchDocument.objects.filter(pk=document.pk).update(search_vector=self.vector())
+
+    def rebuild(self):
+        from .models import PostSearchDocument
+        PostSearchDocument.objects.update(search_vector=self.vector())
+
+    def search(self, queryset, query, rank=True):
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        queryset = queryset.filter(search_document__search_vector=search_query)
+        if rank:
+            queryset = queryset.annotate(
+                search_rank=SearchRank(F('search_document__search_vector'), search_query)
+            ).order_by('-search_rank', '-published_at')
+        return queryset
+
+
+class SQLiteSearchBackend(BasicSearchBackend):
+    """FTS5 search ranked with bm25, for local development"""
+
+    def index(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, tags, excerpt, body) VALUES (%s, %s, %s, %s, %s)',
+                [document.pk, document.title, document.tags, document.excerpt, document.body]
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        from .models import PostSearchDocument
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        for document in PostSearchDocument.objects.iterator():
+            self.index(document)
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every term so user input can't inject FTS5 syntax; the
+        # trailing * gives prefix matching ("djang" finds "django").
+        terms = re.findall(r'\w+', query)
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, query, rank=True):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY score LIMIT %s',
+                [match, MAX_RESULTS]
+            )
+            rows = cursor.fetchall()
+
+        queryset = queryset.filter(pk__in=[row[0] for row in rows])
+        if rank and rows:
+            # bm25 is "lower is better"; flip it so both backends sort descending
+            queryset = queryset.annotate(
+                search_rank=Case(
+                    *[When(pk=pk, then=Value(-score)) for pk, score in rows],
+                    output_field=FloatField()
+                )
+            ).order_by('-search_rank', '-published_at')
+        return queryset
+
+
+_backend = None
+
+
+def get_backend():
+    """Pick the search backend for the default database (cached)"""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+            _backend = SQLiteSearchBackend()
+        else:
+            _backend = BasicSearchBackend()
+    return _backend
+
+
+def build_document(post):
+    """Create or refresh the search document for ``post``"""
+    from .models import PostSearchDocument
+
+    document, _ = PostSearchDocument.objects.update_or_create(
+        post=post,
+        defaults={
+            'title': post.title,
+            'excerpt': post.excerpt,
+            'body': post.content_text or html_to_text(post.content),
+            'tags': ' '.join(post.tags.names()),
+        }
+    )
+    return document
+
+
+def index_post(post):
+    """Incrementally reindex a single post"""
+    get_backend().index(build_document(post))
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def rebuild_index(posts):
+    """Rebuild every document and the vendor index; returns the post count"""
+    count = 0
+    for post in posts.prefetch_related('tags').iterator(chunk_size=100):
+        build_document(post)
+        count += 1
+    get_backend().rebuild()
+    return count
+
+
+def search_posts(queryset, query, rank=True):
+    """Filter ``queryset`` to posts matching ``query``, best matches first"""
+    query = (query or '').strip()
+    if not query:
+        return queryset.none()
+    return get_backend().search(queryset, query, rank=rank)
+
+
+class PostSearchFilter(filters.BaseFilterBackend):
+    """DRF filter backend using the ranked search index.
+
+    Put it after OrderingFilter: results are ordered by relevance unless the
+    client asked for an explicit ``ordering``.
+    """
+    search_param = api_settings.SEARCH_PARAM
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        rank = self.ordering_param not in request.query_params
+        return search_posts(queryset, query, rank=rank)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Full-text search over title, tags, excerpt and content',
+                'schema': {'type': 'string'},
+            },
+        ]
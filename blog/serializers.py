@@ -1,26 +1,24 @@
 from rest_framework import serializers
 from taggit.serializers import TagListSerializerField, TaggitSerializer
+from portfolio_blog.fieldsets import SparseFieldsetsSerializerMixin
+from .comments import index_tree, load_comment_tree
 from .models import Post, Category, Comment
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     """Serializer for blog categories"""
-    posts_count = serializers.SerializerMethodField()
+    posts_count = serializers.IntegerField(source='published_posts_count', read_only=True)
     
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'posts_count', 'created_at']
-        
-    def get_posts_count(self, obj):
-        return obj.posts.filter(status='published').count()
 
 
-class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetsSerializerMixin, TaggitSerializer, serializers.ModelSerializer):
     """Serializer for blog posts"""
     tags = TagListSerializerField()
     author_name = serializers.CharField(source='author.get_full_name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
-    reading_time = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
@@ -28,12 +26,22 @@ class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
             'id', 'title', 'slug', 'excerpt', 'content', 'featured_image',
             'featured_image_alt', 'author', 'author_name', 'category', 'category_name',
             'tags', 'status', 'meta_description', 'meta_keywords',
-            'created_at', 'updated_at', 'published_at', 'views_count', 'reading_time'
+            'created_at', 'updated_at', 'published_at', 'views_count', 'reading_time',
+            'word_count', 'content_outline'
+        ]
+        read_only_fields = ['views_count', 'created_at', 'updated_at', 'reading_time']
+
+
+class PostListSerializer(PostSerializer):
+    """Post representation for list endpoints, without the body and SEO fields"""
+
+    class Meta(PostSerializer.Meta):
+        fields = [
+            'id', 'title', 'slug', 'excerpt', 'featured_image', 'featured_image_alt',
+            'author', 'author_name', 'category', 'category_name', 'tags', 'status',
+            'created_at', 'updated_at', 'published_at', 'views_count', 'reading_time',
+            'word_count'
         ]
-        read_only_fields = ['views_count', 'created_at', 'updated_at']
-        
-    def get_reading_time(self, obj):
-        return obj.get_reading_time()
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -46,6 +54,9 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_approved']
         
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return CommentSerializer(obj.replies.filter(is_approved=True), many=True).data
-        return []
\ No newline at end of file
+        # Replies come from the post's cached comment tree (one query per post)
+        trees = self.context.setdefault('comment_trees', {})
+        if obj.post_id not in trees:
+            trees[obj.post_id] = index_tree(load_comment_tree(obj.post_id))
+        node = trees[obj.post_id].get(obj.pk)
+        return node['replies'] if node else []
\ No newline at end of file
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Comment, Post
+from . import comments, counters, related, search
+
+
+@receiver(post_save, sender=Post)
+def reindex_post_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: search.index_post(instance))
+    related.schedule_update(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_on_tags_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        transaction.on_commit(lambda: search.index_post(instance))
+        related.schedule_update(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_post_on_tags_change(sender, instance, action, **kwargs):
+    """Tags are part of a post's pages, so they move its ETag/Last-Modified"""
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        Post.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(lambda: search.remove_post(post_id))
+
+
+@receiver(pre_save, sender=Post)
+def remember_counted_state(sender, instance, raw=False, **kwargs):
+    """Keep the stored status/category so post_save knows which counters moved"""
+    if raw or not instance.pk:
+        instance._counted_state = None
+        return
+    instance._counted_state = Post.objects.filter(pk=instance.pk).values_list('status', 'category_id').first()
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_counted_state', None)
+    current = (instance.status, instance.category_id)
+    if previous == current:
+        return
+    old_status, old_category_id = previous or (None, None)
+    counters.refresh_category_counts({old_category_id, instance.category_id})
+    if old_status != instance.status and not created:
+        counters.refresh_tag_counts(counters.post_tag_ids([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_counters(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = counters.post_tag_ids([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        counters.refresh_tag_counts(pk_set or ())
+    elif action == 'post_clear':
+        counters.refresh_tag_counts(getattr(instance, '_cleared_tag_ids', ()))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_tags(sender, instance, **kwargs):
+    instance._deleted_tag_ids = counters.post_tag_ids([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    counters.refresh_category_counts({instance.category_id})
+    counters.refresh_tag_counts(getattr(instance, '_deleted_tag_ids', ()))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_tree(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    comments.invalidate_comment_trees([instance.post_id])
@@ -1,3 +1,334 @@
-from django.test import TestCase
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+
+from portfolio.cache_tiers import local_tier
+from portfolio_blog.page_cache import (
+    CACHE_STATUS_HEADER, WARMUP_META, PageCacheMiddleware, add_surrogate_keys, is_cacheable_response,
+)
+from portfolio_blog.pagination import KeysetPagination, cursor_for, decode_cursor
+
+from . import search
+from .counters import CacheCounterStore, LocalCounterStore, view_counter
+from .models import Category, Post, RelatedPost
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, BLOG_VIEW_COUNT_FLUSH_INTERVAL=3600)
+class PageCacheTests(TestCase):
+    """Full-page cache (portfolio_blog.page_cache) on the blog pages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='x')
+        cls.category = Category.objects.create(name='Django')
+        cls.post = Post.objects.create(
+            title='Caching pages', excerpt='Why and how', content='<p>Body</p>',
+            author=cls.author, category=cls.category, status='published',
+        )
+
+    def setUp(self):
+        cache.clear()
+        local_tier.lru.clear()
+        store = mock.patch.object(view_counter, '_store', LocalCounterStore())
+        store.start()
+        self.addCleanup(store.stop)
+
+    def status(self, response):
+        return response.get(CACHE_STATUS_HEADER)
+
+    def test_second_anonymous_read_is_a_hit(self):
+        self.assertEqual(self.status(self.client.get('/blog/')), 'MISS')
+        response = self.client.get('/blog/')
+        self.assertEqual(self.status(response), 'HIT')
+        self.assertContains(response, 'Caching pages')
+
+    def test_session_cookie_bypasses_the_cache(self):
+        self.client.get('/blog/')
+        self.client.cookies['sessionid'] = 'abc'
+        self.assertIsNone(self.status(self.client.get('/blog/')))
+
+    def test_authorization_header_bypasses_the_cache(self):
+        self.client.get('/blog/')
+        response = self.client.get('/blog/', HTTP_AUTHORIZATION='Bearer token')
+        self.assertIsNone(self.status(response))
+
+    def test_tracking_parameters_share_the_page_entry(self):
+        self.client.get('/blog/')
+        response = self.client.get('/blog/', {'utm_source': 'newsletter', 'fbclid': 'abc'})
+        self.assertEqual(self.status(response), 'HIT')
+
+    def test_unknown_query_parameters_are_not_stored(self):
+        for n in range(2):
+            self.assertIsNone(self.status(self.client.get('/blog/', {'x': n})))
+        self.assertIsNone(self.status(self.client.get('/blog/', {'x': 0})))
+
+    def test_parameters_the_view_reads_are_cached_separately(self):
+        self.client.get('/blog/')
+        self.assertEqual(self.status(self.client.get('/blog/', {'page': 1})), 'MISS')
+        self.assertEqual(self.status(self.client.get('/blog/', {'page': 1})), 'HIT')
+
+    def test_saving_a_post_purges_its_pages(self):
+        self.client.get('/blog/')
+        self.assertEqual(self.status(self.client.get('/blog/')), 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Caching pages, revised'
+            self.post.save()
+        response = self.client.get('/blog/')
+        self.assertEqual(self.status(response), 'MISS')
+        self.assertContains(response, 'Caching pages, revised')
+
+    def test_hit_actions_are_replayed(self):
+        url = self.post.get_absolute_url()
+        self.client.get(url)
+        self.assertEqual(view_counter.pending(self.post.pk), 1)
+        self.assertEqual(self.status(self.client.get(url)), 'HIT')
+        self.assertEqual(view_counter.pending(self.post.pk), 2)
+
+    def test_warmup_requests_are_not_counted(self):
+        url = self.post.get_absolute_url()
+        self.client.get(url, **{WARMUP_META: '1'})
+        self.client.get(url, **{WARMUP_META: '1'})
+        self.assertEqual(view_counter.pending(self.post.pk), 0)
+
+    def test_expired_page_is_served_stale_and_refreshed(self):
+        url = self.post.get_absolute_url()
+        self.client.get(url)
+        later = time.time() + 601  # past PAGE_CACHE_TIMEOUT, within the stale window
+        with mock.patch('portfolio_blog.page_cache.schedule') as schedule, \
+                mock.patch('time.time', return_value=later):
+            response = self.client.get(url)
+        self.assertEqual(self.status(response), 'STALE')
+        self.assertContains(response, 'Caching pages')
+        # The stale hit counts; the re-render is not a visit
+        self.assertEqual(view_counter.pending(self.post.pk), 2)
+        schedule.assert_called_once()
+
+        refresh, request, lock_key, token = schedule.call_args.args
+        with mock.patch('time.time', return_value=later):
+            refresh(request, lock_key, token)
+            self.assertEqual(self.status(self.client.get(url)), 'HIT')
+        self.assertEqual(view_counter.pending(self.post.pk), 3)
+        self.assertIsNone(cache.get(lock_key))
+
+
+def csrf_form(request):
+    return add_surrogate_keys(HttpResponse(f'<input name="csrfmiddlewaretoken" value="{get_token(request)}">'), ['posts'])
+
+
+urlpatterns = [path('csrf-form/', csrf_form)]
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, ROOT_URLCONF=__name__)
+class PageCacheCsrfTests(TestCase):
+    """A page that embeds a CSRF token is per-user and must not be stored"""
+
+    def setUp(self):
+        cache.clear()
+        local_tier.lru.clear()
+
+    def test_page_using_a_csrf_token_is_not_stored(self):
+        self.assertIsNone(self.client.get('/csrf-form/').get(CACHE_STATUS_HEADER))
+        # The browser now has the cookie; the token is still per-user
+        self.assertIn(settings.CSRF_COOKIE_NAME, self.client.cookies)
+        self.assertIsNone(self.client.get('/csrf-form/').get(CACHE_STATUS_HEADER))
+
+    def test_token_use_is_detected_without_the_cookie(self):
+        # The state CsrfViewMiddleware leaves behind: the flag is back to
+        # False, but the page still embeds a per-user token
+        response = self.client.get('/csrf-form/')
+        self.assertIs(response.wsgi_request.META['CSRF_COOKIE_NEEDS_UPDATE'], False)
+        response.cookies.clear()
+        self.assertFalse(is_cacheable_response(response.wsgi_request, response))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheStorageTests(TestCase):
+    """Which responses PageCacheMiddleware agrees to store"""
+
+    def setUp(self):
+        cache.clear()
+        local_tier.lru.clear()
+        self.factory = RequestFactory()
+
+    def middleware(self, response):
+        return PageCacheMiddleware(lambda request: response)
+
+    def tagged_response(self):
+        return add_surrogate_keys(HttpResponse('page'), ['posts'])
+
+    def test_tagged_response_is_stored(self):
+        middleware = self.middleware(self.tagged_response())
+        self.assertEqual(middleware(self.factory.get('/page/')).get(CACHE_STATUS_HEADER), 'MISS')
+        self.assertEqual(middleware(self.factory.get('/page/')).get(CACHE_STATUS_HEADER), 'HIT')
+
+    def test_response_setting_a_cookie_is_not_stored(self):
+        response = self.tagged_response()
+        response.set_cookie('theme', 'dark')
+        middleware = self.middleware(response)
+        middleware(self.factory.get('/page/'))
+        self.assertIsNone(middleware(self.factory.get('/page/')).get(CACHE_STATUS_HEADER))
+
+    def test_untagged_response_is_not_stored(self):
+        middleware = self.middleware(HttpResponse('page'))
+        middleware(self.factory.get('/page/'))
+        self.assertIsNone(middleware(self.factory.get('/page/')).get(CACHE_STATUS_HEADER))
+
+
+class PostCardFragmentTests(TestCase):
+    """The cached post card follows changes to the post's tags"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='x')
+        cls.post = Post.objects.create(
+            title='Tagged', excerpt='Cards', content='<p>Body</p>',
+            author=author, status='published',
+        )
+
+    def setUp(self):
+        cache.clear()
+        local_tier.lru.clear()
+
+    def assertCardShowsTag(self, name):
+        # The sidebar's popular tags carry a post count after the name
+        self.assertRegex(self.client.get('/blog/').content.decode(), rf'#{name}\s*</a>')
+
+    def test_adding_a_tag_updates_the_card(self):
+        self.client.get('/blog/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add('caching')
+        self.assertCardShowsTag('caching')
+
+    def test_renaming_a_tag_updates_the_card(self):
+        self.post.tags.add('caching')
+        self.client.get('/blog/')
+        tag = self.post.tags.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'cache-layers'
+            tag.save()
+        self.assertCardShowsTag('cache-layers')
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor round-trips through the API's keyset pagination"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='x')
+        cls.posts = [
+            Post.objects.create(
+                title='Zebrafish notes', excerpt='Tied', content='<p>zebrafish zebrafish</p>',
+                author=author, status='published',
+            )
+            for _ in range(7)
+        ]
+        # Every post ties on published_at; only the pk tiebreak orders them
+        Post.objects.update(published_at=timezone.now())
+        for post in Post.objects.all():
+            search.index_post(post)
+        cls.expected = sorted(post.pk for post in cls.posts)[::-1]
+
+    def setUp(self):
+        page_size = mock.patch.object(KeysetPagination, 'page_size', 3)
+        page_size.start()
+        self.addCleanup(page_size.stop)
+
+    def walk(self, url, link='next'):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([item['id'] for item in data['results']])
+            url = data[link]
+        return pages
+
+    def test_cursor_decodes_to_the_row_key(self):
+        post = Post.objects.get(pk=self.posts[0].pk)
+        ordering = ['-published_at', '-id']
+        self.assertEqual(decode_cursor(cursor_for(post, ordering), Post, ordering), [post.published_at, post.pk])
+
+    def test_next_links_visit_every_row_once(self):
+        pages = self.walk('/api/posts/')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_previous_links_return_the_same_pages(self):
+        pages = self.walk('/api/posts/')
+        last = self.client.get('/api/posts/', {'after': cursor_for(
+            Post.objects.get(pk=pages[1][-1]), ['-published_at', '-id']
+        )}).json()
+        self.assertEqual(self.walk(last['previous'], link='previous'), pages[:2][::-1])
+
+    def test_ranked_search_pages_through_tied_ranks(self):
+        pages = self.walk('/api/posts/?search=zebrafish')
+        self.assertEqual(sorted(sum(pages, []), reverse=True), self.expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/posts/', {'after': 'not-a-cursor'}).status_code, 404)
+        self.assertEqual(self.client.get('/blog/', {'after': 'not-a-cursor'}).status_code, 404)
+
+
+class RebuildRelatedPostsTests(TestCase):
+    """The rebuild_related_posts backfill command"""
+
+    def test_command_rebuilds_every_post(self):
+        author = User.objects.create_user('author', password='x')
+        category = Category.objects.create(name='Django')
+        first, second = [
+            Post.objects.create(
+                title=title, excerpt='Related', content='<p>Body</p>',
+                author=author, category=category, status='published',
+            )
+            for title in ('First', 'Second')
+        ]
+        # Signal-driven updates only run on commit, which TestCase never does
+        self.assertFalse(RelatedPost.objects.exists())
+        out = StringIO()
+        call_command('rebuild_related_posts', stdout=out)
+        self.assertIn('Rebuilt related posts for 2 posts', out.getvalue())
+        self.assertEqual(
+            set(RelatedPost.objects.values_list('post_id', 'related_id')),
+            {(first.pk, second.pk), (second.pk, first.pk)},
+        )
+
+
+class FlushViewCountsTests(TestCase):
+    """The flush_view_counts command only flushes the shared buffer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='x')
+        cls.post = Post.objects.create(
+            title='Counted', excerpt='Views', content='<p>Body</p>',
+            author=author, status='published',
+        )
+
+    def use_store(self, store):
+        patcher = mock.patch.object(view_counter, '_store', store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_in_process_buffer_is_an_error(self):
+        self.use_store(LocalCounterStore())
+        with self.assertRaisesMessage(CommandError, 'BLOG_VIEW_COUNT_BUFFER'):
+            call_command('flush_view_counts', stdout=StringIO())
+
+    def test_shared_buffer_is_flushed(self):
+        cache.clear()
+        self.use_store(CacheCounterStore())
+        view_counter.store.incr(self.post.pk)
+        view_counter.store.incr(self.post.pk)
+        out = StringIO()
+        call_command('flush_view_counts', stdout=out)
+        self.assertIn('Flushed 2 buffered views', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 2)
@@ -1,29 +1,49 @@
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView
-from django.db.models import Q
 from django.core.paginator import Paginator
+from django.db.models import Q
 from taggit.models import Tag
-from .models import Post, Category
+from portfolio_blog.cache_policy import cache_policy
+from portfolio_blog.conditional import ConditionalGetMixin
+from portfolio_blog.page_cache import SurrogateKeyMixin, is_visit, on_hit
+from portfolio_blog.pagination import KeysetPaginationMixin
+from .models import Post, Category, RelatedPost
+from .counters import view_counter
+from .search import search_posts
 
 
-class PostListView(ListView):
+class PostListView(SurrogateKeyMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     """Display list of published blog posts"""
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     paginate_by = 9
+    surrogate_keys = ('posts', 'categories')
+    page_cache_params = ('page', 'after', 'before')
     
     def get_queryset(self):
         return Post.objects.filter(status='published').select_related('category', 'author').prefetch_related('tags')
+
+    def get_popular_tags(self):
+        return Tag.objects.filter(
+            blog_stats__published_posts_count__gt=0
+        ).select_related('blog_stats').order_by('-blog_stats__published_posts_count', 'name')[:10]
+
+    def get_validator_extra(self):
+        # The sidebar: categories and tag counts change without touching a post
+        return (
+            list(Category.objects.values_list('pk', 'name', 'slug')),
+            list(self.get_popular_tags().values_list('pk', 'name', 'slug', 'blog_stats__published_posts_count')),
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = Category.objects.all()
-        context['popular_tags'] = Tag.objects.all()[:10]
+        context['popular_tags'] = self.get_popular_tags()
         return context
 
 
-class PostDetailView(DetailView):
+class PostDetailView(SurrogateKeyMixin, ConditionalGetMixin, DetailView):
     """Display single blog post"""
     model = Post
     template_name = 'blog/post_detail.html'
@@ -31,29 +51,58 @@ class PostDetailView(DetailView):
     
     def get_queryset(self):
         return Post.objects.filter(status='published').select_related('category', 'author').prefetch_related('tags')
+
+    def get_surrogate_keys(self):
+        return [f'post:{self.object.pk}'] + [f'post:{post.pk}' for post in self.related_posts]
     
+    # The related posts are recomputed without touching any timestamp
+    send_last_modified = False
+
+    def get_validator_queryset(self):
+        # The page shows the post and its related posts
+        slug = self.kwargs['slug']
+        related_ids = RelatedPost.objects.filter(post__slug=slug).values('related_id')
+        return self.get_queryset().filter(Q(slug=slug) | Q(pk__in=related_ids))
+
+    def not_modified(self, response):
+        # A revalidated page is still a view
+        post_id = self.get_queryset().filter(slug=self.kwargs['slug']).values_list('pk', flat=True).first()
+        if post_id and is_visit(self.request):
+            view_counter.record(post_id)
+        return response
+
     def get_object(self):
         post = super().get_object()
-        # Increment view count
-        post.views_count += 1
-        post.save(update_fields=['views_count'])
+        # Buffer the view; it is written to the row by the periodic flusher.
+        # Show the buffered views too so the count doesn't lag visibly.
+        if not is_visit(self.request):
+            # Background re-render or cache warm-up, not a visit
+            post.views_count += view_counter.pending(post.pk)
+        else:
+            post.views_count += view_counter.record(post.pk)
+        # A page served from the full-page cache is still a view
+        on_hit(self.request, 'blog.counters.record_view', post.pk)
         return post
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Related posts
-        context['related_posts'] = Post.objects.filter(
-            category=self.object.category,
-            status='published'
-        ).exclude(pk=self.object.pk)[:3]
+        # Related posts are precomputed by blog.related
+        self.related_posts = context['related_posts'] = [
+            entry.related for entry in RelatedPost.objects.filter(
+                post=self.object,
+                related__status='published'
+            ).select_related('related__category')[:3]
+        ]
         return context
 
 
-class CategoryPostsView(ListView):
+class CategoryPostsView(SurrogateKeyMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     """Display posts by category"""
     template_name = 'blog/category_posts.html'
     context_object_name = 'posts'
     paginate_by = 9
+    surrogate_keys = ('posts', 'categories')
+    page_cache_params = ('page', 'after', 'before')
     
     def get_queryset(self):
         self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
@@ -61,6 +110,9 @@ class CategoryPostsView(ListView):
             category=self.category,
             status='published'
         ).select_related('category', 'author').prefetch_related('tags')
+
+    def get_validator_extra(self):
+        return (list(Category.objects.values_list('pk', 'name', 'slug')),)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -69,11 +121,13 @@ class CategoryPostsView(ListView):
         return context
 
 
-class TagPostsView(ListView):
+class TagPostsView(SurrogateKeyMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     """Display posts by tag"""
     template_name = 'blog/tag_posts.html'
     context_object_name = 'posts'
     paginate_by = 9
+    surrogate_keys = ('posts', 'categories')
+    page_cache_params = ('page', 'after', 'before')
     
     def get_queryset(self):
         self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
@@ -81,6 +135,9 @@ class TagPostsView(ListView):
             tags=self.tag,
             status='published'
         ).select_related('category', 'author').prefetch_related('tags')
+
+    def get_validator_extra(self):
+        return (list(Category.objects.values_list('pk', 'name', 'slug')),)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -89,6 +146,7 @@ class TagPostsView(ListView):
         return context
 
 
+@cache_policy(max_age=60, s_maxage=300)
 class PostSearchView(ListView):
     """Search blog posts"""
     template_name = 'blog/post_search.html'
@@ -97,15 +155,8 @@ class PostSearchView(ListView):
     
     def get_queryset(self):
         query = self.request.GET.get('q', '')
-        if query:
-            return Post.objects.filter(
-                Q(title__icontains=query) |
-                Q(excerpt__icontains=query) |
-                Q(content__icontains=query) |
-                Q(tags__name__icontains=query),
-                status='published'
-            ).distinct().select_related('category', 'author').prefetch_related('tags')
-        return Post.objects.none()
+        posts = Post.objects.filter(status='published').select_related('category', 'author').prefetch_related('tags')
+        return search_posts(posts, query)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -3,6 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 from .models import Project, Skill, Experience, Education, Profile
+from .signals import invalidate_queryset
 
 
 @admin.register(Profile)
@@ -195,22 +196,26 @@ class ProjectAdmin(admin.ModelAdmin):
     actions = ['make_published', 'make_draft', 'mark_featured', 'unmark_featured']
     
     def make_published(self, request, queryset):
-        updated = queryset.update(status='published')
+        invalidate_queryset(queryset)
+        updated = queryset.update(status='published', updated_at=timezone.now())
         self.message_user(request, f'{updated} projects marked as published.')
     make_published.short_description = 'Mark selected projects as published'
     
     def make_draft(self, request, queryset):
-        updated = queryset.update(status='draft')
+        invalidate_queryset(queryset)
+        updated = queryset.update(status='draft', updated_at=timezone.now())
         self.message_user(request, f'{updated} projects marked as draft.')
     make_draft.short_description = 'Mark selected projects as draft'
     
     def mark_featured(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        invalidate_queryset(queryset)
+        updated = queryset.update(is_featured=True, updated_at=timezone.now())
         self.message_user(request, f'{updated} projects marked as featured.')
     mark_featured.short_description = 'Mark selected projects as featured'
     
     def unmark_featured(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        invalidate_queryset(queryset)
+        updated = queryset.update(is_featured=False, updated_at=timezone.now())
         self.message_user(request, f'{updated} projects unmarked as featured.')
     unmark_featured.short_description = 'Unmark selected projects as featured'
 
@@ -7,5 +7,6 @@ router.register(r'projects', api_views.ProjectViewSet)
 router.register(r'skills', api_views.SkillViewSet)
 
 urlpatterns = [
+    path('cache-metrics/', api_views.CacheMetricsView.as_view(), name='cache-metrics'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,18 +1,28 @@
 from rest_framework import viewsets, filters
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Prefetch
+from .cache_metrics import cache_metrics
 from .models import Project, Skill, Experience, Education, Profile
+from portfolio_blog.conditional import ConditionalGetViewSetMixin
+from portfolio_blog.fieldsets import SparseFieldsetsMixin
+from portfolio_blog.pagination import KeysetPagination
 from .serializers import (
-    ProjectSerializer, SkillSerializer, ExperienceSerializer, 
+    ProjectSerializer, ProjectListSerializer, SkillSerializer, ExperienceSerializer, 
     EducationSerializer, ProfileSerializer
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetViewSetMixin, SparseFieldsetsMixin, viewsets.ModelViewSet):
     """API viewset for portfolio projects"""
     queryset = Project.objects.filter(status='published').prefetch_related('technologies')
     serializer_class = ProjectSerializer
+    list_serializer_class = ProjectListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    keyset_ordering = ['order', '-created_at', '-id']
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['project_type', 'technologies', 'is_featured']
     search_fields = ['title', 'short_description', 'description']
@@ -20,8 +30,17 @@ class ProjectViewSet(viewsets.ModelViewSet):
     ordering = ['order', '-created_at']
     lookup_field = 'slug'
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_serializer_class() is ProjectListSerializer:
+            # List rows only nest the skill summary
+            queryset = queryset.prefetch_related(None).prefetch_related(
+                Prefetch('technologies', queryset=Skill.objects.only('id', 'name', 'skill_type'))
+            )
+        return queryset
 
-class SkillViewSet(viewsets.ModelViewSet):
+
+class SkillViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
     """API viewset for skills"""
     queryset = Skill.objects.all().order_by('order')
     serializer_class = SkillSerializer
@@ -33,7 +52,7 @@ class SkillViewSet(viewsets.ModelViewSet):
     ordering = ['order', 'name']
 
 
-class ExperienceViewSet(viewsets.ReadOnlyModelViewSet):
+class ExperienceViewSet(SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """API viewset for work experience"""
     queryset = Experience.objects.all().order_by('order')
     serializer_class = ExperienceSerializer
@@ -43,7 +62,7 @@ class ExperienceViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['order', '-start_date']
 
 
-class EducationViewSet(viewsets.ReadOnlyModelViewSet):
+class EducationViewSet(SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """API viewset for education"""
     queryset = Education.objects.all().order_by('order')
     serializer_class = EducationSerializer
@@ -53,7 +72,15 @@ class EducationViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['order', '-start_date']
 
 
-class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
+class ProfileViewSet(ConditionalGetViewSetMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
     """API viewset for profile"""
     queryset = Profile.objects.filter(is_active=True)
-    serializer_class = ProfileSerializer
\ No newline at end of file
+    serializer_class = ProfileSerializer
+
+
+class CacheMetricsView(APIView):
+    """Cache hit rates, fills and payload sizes per namespace (staff only)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_metrics.report())
@@ -0,0 +1,137 @@
+# CACHE METRICS
+#
+# Hit/miss/stale/fill counters per cache namespace (the first segment of a
+# CacheManager.make_key key: homepage, projects, skills, pages, ...), plus
+# fill latency and payload size, so TTLs can be tuned from data.
+#
+# Recording is a dict update in the worker. Every CACHE_METRICS_FLUSH_INTERVAL
+# seconds the worker adds its deltas to shared counters in the cache, where
+# the report (API endpoint and `cache_stats` command) reads the totals of
+# all workers.
+
+import logging
+import pickle
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KEY = 'cache:metrics:{}:{}'
+NAMESPACES_KEY = 'cache:metrics:namespaces'
+METRICS = ('hits', 'misses', 'stale', 'fills', 'fill_ms', 'bytes')
+
+
+def namespace_of(key):
+    """Namespace of a CacheManager key ("homepage:<gen>:<hash>" -> "homepage")"""
+    return key.split(':', 1)[0]
+
+
+def payload_size(value):
+    """Approximate stored size of ``value`` (only measured on fills)"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class CacheMetrics:
+    """Per-namespace cache counters, buffered in-process"""
+
+    def __init__(self, flush_interval=None):
+        self._flush_interval = flush_interval
+        self._pending = Counter()
+        self._namespaces = set()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'CACHE_METRICS_ENABLED', True)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is None:
+            return getattr(settings, 'CACHE_METRICS_FLUSH_INTERVAL', 30)
+        return self._flush_interval
+
+    def _add(self, namespace, **deltas):
+        if not self.enabled:
+            return
+        with self._lock:
+            for metric, delta in deltas.items():
+                self._pending[(namespace, metric)] += delta
+        self.maybe_flush()
+
+    def hit(self, namespace):
+        self._add(namespace, hits=1)
+
+    def miss(self, namespace):
+        self._add(namespace, misses=1)
+
+    def stale(self, namespace):
+        self._add(namespace, stale=1)
+
+    def fill(self, namespace, seconds, size):
+        self._add(namespace, fills=1, fill_ms=int(seconds * 1000), bytes=size)
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Add this worker's counts to the shared totals"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            namespaces = {namespace for namespace, _ in pending}
+            if not namespaces <= self._namespaces:
+                known = set(cache.get(NAMESPACES_KEY) or ())
+                self._namespaces = known | namespaces
+                if not namespaces <= known:
+                    cache.set(NAMESPACES_KEY, sorted(self._namespaces), None)
+            for (namespace, metric), delta in pending.items():
+                key = COUNTER_KEY.format(namespace, metric)
+                cache.add(key, 0, None)
+                try:
+                    cache.incr(key, delta)
+                except ValueError:
+                    cache.set(key, delta, None)
+        except Exception as e:
+            # Metrics must never break a request
+            logger.warning("Could not flush cache metrics: %s", e)
+
+    def report(self):
+        """Totals per namespace with derived hit rate and averages"""
+        self.flush()
+        namespaces = sorted(set(cache.get(NAMESPACES_KEY) or ()))
+        keys = [COUNTER_KEY.format(namespace, metric) for namespace in namespaces for metric in METRICS]
+        values = cache.get_many(keys)
+        report = {}
+        for namespace in namespaces:
+            row = {metric: values.get(COUNTER_KEY.format(namespace, metric), 0) for metric in METRICS}
+            reads = row['hits'] + row['misses'] + row['stale']
+            row['hit_rate'] = round((row['hits'] + row['stale']) / reads, 4) if reads else None
+            row['avg_fill_ms'] = round(row['fill_ms'] / row['fills'], 1) if row['fills'] else None
+            row['avg_bytes'] = row['bytes'] // row['fills'] if row['fills'] else None
+            report[namespace] = row
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+        namespaces = cache.get(NAMESPACES_KEY) or ()
+        cache.delete_many([COUNTER_KEY.format(namespace, metric) for namespace in namespaces for metric in METRICS])
+        cache.delete(NAMESPACES_KEY)
+        self._namespaces = set()
+
+
+cache_metrics = CacheMetrics()
@@ -0,0 +1,58 @@
+# BACKGROUND CACHE REFRESH
+#
+# Stale-while-revalidate: a request that finds an expired entry serves the
+# stale copy and hands the recompute to a small per-process thread pool.
+# Callers already hold the entry's recompute lock, so at most one refresh
+# per key runs across all workers.
+#
+# CACHE_BACKGROUND_REFRESH = False runs refreshes inline instead (the
+# request that found the stale entry pays for it, as before).
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def background_enabled():
+    return getattr(settings, 'CACHE_BACKGROUND_REFRESH', True)
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _lock:
+        # A forked gunicorn worker needs its own pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CACHE_REFRESH_WORKERS', 2),
+                thread_name_prefix='cache-refresh',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background cache refresh failed")
+    finally:
+        close_old_connections()
+
+
+def schedule(func, *args, **kwargs):
+    """Run ``func`` off the request thread (inline if disabled)"""
+    if not background_enabled():
+        func(*args, **kwargs)
+        return
+    _get_executor().submit(_run, func, args, kwargs)
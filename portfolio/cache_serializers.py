@@ -0,0 +1,58 @@
+# CACHE SERIALIZERS
+#
+# Binary serializer for django-redis. Snapshots (see snapshots.py) are
+# packed positionally as msgpack extension types: the type name, its schema
+# version and the field values, without field names. Everything else that
+# the previous JSONSerializer accepted (dicts, lists, strings, numbers and
+# the types DjangoJSONEncoder converts) is still accepted.
+
+import msgpack
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django_redis.serializers.base import BaseSerializer
+
+from .snapshots import SNAPSHOT_TYPES, Snapshot
+
+SNAPSHOT_EXT = 1
+DATE_EXT = 2
+
+_json_encoder = DjangoJSONEncoder()
+
+
+def _encode(obj):
+    if isinstance(obj, Snapshot):
+        payload = [type(obj).__name__, obj.version, *obj.to_row()]
+        return msgpack.ExtType(SNAPSHOT_EXT, _pack(payload))
+    if isinstance(obj, date) and not isinstance(obj, datetime):
+        return msgpack.ExtType(DATE_EXT, obj.isoformat().encode())
+    # Naive datetimes, Decimal, UUID, lazy strings: as JSONSerializer did
+    return _json_encoder.default(obj)
+
+
+def _decode(code, data):
+    if code == SNAPSHOT_EXT:
+        name, version, *row = _unpack(data)
+        return SNAPSHOT_TYPES[name].from_row(version, row)
+    if code == DATE_EXT:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def _pack(value):
+    # Aware datetimes use msgpack's own timestamp type
+    return msgpack.packb(value, default=_encode, use_bin_type=True, datetime=True)
+
+
+def _unpack(data):
+    return msgpack.unpackb(data, ext_hook=_decode, raw=False, timestamp=3, strict_map_key=False)
+
+
+class SnapshotMSGPackSerializer(BaseSerializer):
+    """msgpack serializer that round-trips snapshots and dates"""
+
+    def dumps(self, value):
+        return _pack(value)
+
+    def loads(self, value):
+        return _unpack(value)
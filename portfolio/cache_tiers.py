@@ -0,0 +1,202 @@
+# IN-PROCESS CACHE TIER
+#
+# A bounded LRU with TTL that sits in front of the shared cache (Redis in
+# production) for small, hot entries: the namespace generations every
+# cache key is built from, and values such as the homepage snapshot.
+# Hits cost no network round trip and no zlib decompression.
+#
+# Workers stay coherent through an invalidation bus: whenever a key changes
+# in the shared cache, its name is published and every worker drops its
+# local copy. The TTL bounds staleness if a message is ever lost. Values
+# are shared by all threads of a worker and must be treated as read-only.
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache:invalidate'
+
+
+class LRUCache:
+    """Thread-safe bounded mapping whose entries also expire after ``ttl``"""
+
+    def __init__(self, maxsize=512, ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalInvalidationBus:
+    """In-process bus: delivers messages to this process's subscribers only.
+
+    Used in development, in tests, and when the shared cache isn't Redis.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def publish(self, keys):
+        for callback in list(self._subscribers):
+            callback(list(keys))
+
+
+class RedisInvalidationBus:
+    """Redis pub/sub bus shared by every worker using the same Redis"""
+
+    def __init__(self, channel=CHANNEL):
+        self.channel = channel
+        self.sender = uuid.uuid4().hex
+        self._subscribers = []
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        self._ensure_listener()
+
+    def publish(self, keys):
+        try:
+            self._ensure_listener()
+            message = json.dumps({'sender': self.sender, 'keys': list(keys)})
+            self._connection().publish(self.channel, message)
+        except Exception as e:
+            # Local copies still expire on their TTL
+            logger.warning("Could not publish cache invalidation: %s", e)
+
+    def _ensure_listener(self):
+        # Started lazily so every forked gunicorn worker runs its own thread
+        with self._lock:
+            if self._listener_pid == os.getpid() or not self._subscribers:
+                return
+            self._listener_pid = os.getpid()
+            thread = threading.Thread(target=self._listen, daemon=True)
+            thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._dispatch(message.get('data'))
+            except Exception as e:
+                logger.warning("Cache invalidation listener failed, reconnecting: %s", e)
+                time.sleep(1)
+
+    def _dispatch(self, data):
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if payload.get('sender') == self.sender:
+            return
+        for callback in list(self._subscribers):
+            callback(payload.get('keys', []))
+
+
+class LocalTier:
+    """The per-process LRU plus the bus that keeps it coherent"""
+
+    def __init__(self, lru=None, bus=None):
+        self._lru = lru
+        self._bus = bus
+        self._lock = threading.Lock()
+
+    @property
+    def lru(self):
+        if self._lru is None:
+            self._lru = LRUCache(
+                maxsize=getattr(settings, 'CACHE_LOCAL_MAXSIZE', 512),
+                ttl=getattr(settings, 'CACHE_LOCAL_TTL', 10),
+            )
+        return self._lru
+
+    @property
+    def bus(self):
+        with self._lock:
+            if self._bus is None:
+                self._bus = self._default_bus()
+                self._bus.subscribe(self.lru.delete_many)
+        return self._bus
+
+    @staticmethod
+    def _default_bus():
+        backend = getattr(settings, 'CACHE_INVALIDATION_BUS', 'auto')
+        if backend == 'auto':
+            cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            backend = 'redis' if 'redis' in cache_backend.lower() else 'local'
+        return RedisInvalidationBus() if backend == 'redis' else LocalInvalidationBus()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'CACHE_LOCAL_MAXSIZE', 512) > 0
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        self.bus  # make sure this worker is listening
+        return self.lru.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        if self.enabled:
+            self.lru.set(key, value, ttl)
+
+    def invalidate(self, keys):
+        """Drop ``keys`` here and in every other worker"""
+        keys = list(keys)
+        if not keys:
+            return
+        self.lru.delete_many(keys)
+        if self.enabled:
+            self.bus.publish(keys)
+
+
+local_tier = LocalTier()
@@ -2,14 +2,42 @@
 # Create this as portfolio/cache_utils.py
 
 from django.core.cache import cache
-from django.utils import timezone
-from functools import wraps
 import hashlib
 import json
+import logging
+import math
+import random
+import time
+import uuid
+
+from .cache_metrics import cache_metrics, namespace_of, payload_size
+from .cache_refresh import schedule
+from .cache_tiers import local_tier
+
+logger = logging.getLogger(__name__)
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
 
 class CacheManager:
-    """Advanced cache management utilities"""
+    """Advanced cache management utilities
+
+    Entries can be tagged with the entities they were built from
+    ("post:42", "category:football", "homepage"). Each tag has a version
+    number in the cache and a tagged entry remembers the versions it saw.
+    Invalidating a tag bumps its version, which orphans every dependent
+    entry in O(tags) without knowing their keys.
+
+    The same counters double as namespace generations: ``make_key`` embeds
+    the current generation of its namespaces in the key, so a write moves
+    readers to fresh keys and the old generation simply ages out. Misses
+    follow content changes instead of the clock.
+    """
     
     TIMEOUTS = {
         'homepage': 900,        # 15 minutes
@@ -19,6 +47,15 @@ class CacheManager:
         'blog_posts': 300,      # 5 minutes
         'static_pages': 3600,   # 1 hour
     }
+
+    TAG_VERSION_KEY = 'cache:tag:{}'
+
+    # Stampede protection and stale-while-revalidate (get_or_compute)
+    STALE_TTL = 300         # hard TTL: seconds past the soft TTL a value may still be served
+    LOCK_TIMEOUT = 30       # seconds before an abandoned recompute lock frees itself
+    LOCK_WAIT = 1.0         # seconds a request without a stale value waits for the lock holder
+    POLL_INTERVAL = 0.05
+    XFETCH_BETA = 1.0       # > 1 refreshes earlier, < 1 later
     
     @staticmethod
     def get_cache_key(*args, **kwargs):
@@ -26,57 +63,269 @@ class CacheManager:
         key_data = {
             'args': args,
             'kwargs': kwargs,
-            'timestamp': timezone.now().strftime('%Y%m%d%H')  # Hour-based versioning
         }
-        key_string = json.dumps(key_data, sort_keys=True)
+        key_string = json.dumps(key_data, sort_keys=True, default=str)
         return hashlib.md5(key_string.encode()).hexdigest()
-    
+
+    # Generations
+
+    @classmethod
+    def get_generation(cls, namespace):
+        return cls.get_tag_versions([namespace])[namespace]
+
+    @classmethod
+    def bump_generation(cls, *namespaces):
+        """Move every key in ``namespaces`` to a new generation"""
+        cls.invalidate_tags(*namespaces)
+
+    @classmethod
+    def make_key(cls, namespaces, *args, **kwargs):
+        """Cache key under the current generation of ``namespaces``
+
+        ``namespaces`` is a name or a list of names; the key changes when any
+        of them is bumped.
+        """
+        if isinstance(namespaces, str):
+            namespaces = [namespaces]
+        versions = cls.get_tag_versions(namespaces)
+        generation = '.'.join(str(versions[name]) for name in namespaces)
+        return f"{namespaces[0]}:{generation}:{cls.get_cache_key(*args, **kwargs)}"
+
+    # Tags
+
+    @staticmethod
+    def _new_version():
+        # Time based, so a version key that was evicted never comes back
+        # with a number an old entry already recorded
+        return time.time_ns()
+
     @classmethod
-    def cached_query(cls, cache_type, key_suffix=''):
-        """Decorator for caching database queries"""
-        def decorator(func):
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                cache_key = f"{cache_type}_{key_suffix}_{cls.get_cache_key(*args, **kwargs)}"
-                result = cache.get(cache_key)
-                
-                if result is None:
-                    result = func(*args, **kwargs)
-                    timeout = cls.TIMEOUTS.get(cache_type, 900)
-                    cache.set(cache_key, result, timeout)
-                
-                return result
-            return wrapper
-        return decorator
+    def _read_versions(cls, keys):
+        """Version keys from the in-process tier, falling back to the shared cache"""
+        found = {}
+        missing = []
+        for key in keys:
+            version = local_tier.get(key)
+            if version is None:
+                missing.append(key)
+            else:
+                found[key] = version
+        if missing:
+            shared = cache.get_many(missing)
+            for key, version in shared.items():
+                local_tier.set(key, version)
+            found.update(shared)
+        return found
+
+    @classmethod
+    def get_tag_versions(cls, tags):
+        """Current version of every tag, creating missing ones"""
+        keys = {tag: cls.TAG_VERSION_KEY.format(tag) for tag in tags}
+        found = cls._read_versions(keys.values())
+        versions = {}
+        for tag, key in keys.items():
+            version = found.get(key)
+            if version is None:
+                version = cls._new_version()
+                if not cache.add(key, version, None):
+                    version = cache.get(key, version)
+                local_tier.set(key, version)
+            versions[tag] = version
+        return versions
+
+    @classmethod
+    def set_tagged(cls, key, value, tags, timeout=None):
+        """Store ``value`` under ``key``, dependent on ``tags``"""
+        entry = {'tags': cls.get_tag_versions(tags), 'value': value}
+        cache.set(key, entry, timeout)
+
+    @classmethod
+    def get_tagged(cls, key, default=None):
+        """Value stored by ``set_tagged``, or ``default`` if missing or invalidated"""
+        value = cls.read_tagged(key, default)
+        if value is default:
+            cache_metrics.miss(namespace_of(key))
+        else:
+            cache_metrics.hit(namespace_of(key))
+        return value
+
+    @classmethod
+    def read_tagged(cls, key, default=None):
+        """``get_tagged`` for callers that record their own metrics"""
+        entry = cache.get(key)
+        if not isinstance(entry, dict) or 'tags' not in entry or not cls._is_current(entry):
+            return default
+        return entry['value']
+
+    @classmethod
+    def invalidate_tags(cls, *tags):
+        """Invalidate every entry tagged with any of ``tags``"""
+        keys = [cls.TAG_VERSION_KEY.format(tag) for tag in set(tags)]
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, cls._new_version(), None)
+        # Drop the old versions from every worker's in-process tier
+        local_tier.invalidate(keys)
     
+    # Single-flight recompute
+
+    @classmethod
+    def store(cls, key, value, timeout, tags=(), delta=0.0, local=False):
+        """Write an entry readable by get_or_compute and get_tagged.
+
+        The cache keeps it ``STALE_TTL`` past its soft expiry so it can be
+        served while one worker recomputes it. ``delta`` is how long the
+        value took to compute (it drives early refresh). ``local`` also
+        keeps it in this worker's in-process tier.
+        """
+        entry = {
+            'tags': cls.get_tag_versions(tags),
+            'value': value,
+            'expires': time.time() + timeout,
+            'delta': delta,
+        }
+        cache.set(key, entry, timeout + cls.STALE_TTL)
+        local_tier.invalidate([key])
+        if local:
+            local_tier.set(key, entry, timeout)
+
+    @classmethod
+    def _is_current(cls, entry):
+        if not entry['tags']:
+            return True
+        current = cls._read_versions([cls.TAG_VERSION_KEY.format(tag) for tag in entry['tags']])
+        return all(current.get(cls.TAG_VERSION_KEY.format(tag)) == version for tag, version in entry['tags'].items())
+
+    @classmethod
+    def _needs_refresh(cls, entry, beta):
+        # XFetch: refresh early with a probability that grows as expiry
+        # nears and with how expensive the value is to recompute
+        early = entry.get('delta', 0) * beta * -math.log(1.0 - random.random())
+        return time.time() + early >= entry.get('expires', 0)
+
+    @classmethod
+    def get_or_compute(cls, key, compute, timeout, tags=(), beta=None, local=False):
+        """Cached value of ``compute()`` with stampede protection
+
+        ``timeout`` is the soft TTL. Past it (or probabilistically just
+        before it) the stale value keeps being served, for at most
+        ``STALE_TTL`` more, while the worker holding the lock recomputes it
+        in the background (see cache_refresh). Without any value to serve,
+        requests wait up to ``LOCK_WAIT`` for the lock holder, then compute
+        it themselves.
+
+        ``local`` serves small, hot entries from the in-process tier
+        (see cache_tiers) before asking the shared cache.
+        """
+        beta = cls.XFETCH_BETA if beta is None else beta
+        entry = local_tier.get(key) if local else None
+        if entry is None:
+            entry = cache.get(key)
+            if local and isinstance(entry, dict) and 'expires' in entry:
+                local_tier.set(key, entry, max(0, entry['expires'] - time.time()))
+        if not isinstance(entry, dict) or 'value' not in entry or not cls._is_current(entry):
+            entry = None
+        namespace = namespace_of(key)
+        if entry is None:
+            cache_metrics.miss(namespace)
+        elif time.time() < entry.get('expires', 0):
+            cache_metrics.hit(namespace)
+        else:
+            cache_metrics.stale(namespace)
+        if entry is not None and not cls._needs_refresh(entry, beta):
+            return entry['value']
+
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, cls.LOCK_TIMEOUT):
+            if entry is not None:
+                return entry['value']
+            deadline = time.monotonic() + cls.LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(cls.POLL_INTERVAL)
+                entry = cache.get(key)
+                if isinstance(entry, dict) and 'value' in entry and cls._is_current(entry):
+                    return entry['value']
+            return compute()
+
+        if entry is not None:
+            schedule(cls._refresh, key, compute, timeout, tags, local, lock_key, token, entry)
+            return entry['value']
+        return cls._refresh(key, compute, timeout, tags, local, lock_key, token)
+
+    @classmethod
+    def _refresh(cls, key, compute, timeout, tags, local, lock_key, token, stale=None):
+        """Compute and store ``key``, then release the lock if still ours
+
+        If ``compute()`` fails while a ``stale`` entry exists, the stale
+        value is returned and stays cached until its hard TTL; the next
+        request past the soft TTL tries again.
+        """
+        try:
+            started = time.monotonic()
+            value = compute()
+            delta = time.monotonic() - started
+            cls.store(key, value, timeout, tags, delta=delta, local=local)
+            cache_metrics.fill(namespace_of(key), delta, payload_size(value))
+            return value
+        except Exception:
+            if stale is None:
+                raise
+            logger.exception("Refreshing %s failed; serving the stale value", key)
+            return stale['value']
+        finally:
+            cls.release_lock(lock_key, token)
+
     @staticmethod
-    def invalidate_cache(patterns):
-        """Invalidate multiple cache keys by pattern"""
+    def release_lock(lock_key, token):
+        """Delete ``lock_key`` only if it still holds ``token``
+
+        On Redis the check and the delete are one Lua script. Other backends
+        have no compare-and-delete, so they get and then delete. If the lock
+        expires and another worker takes it between the two calls, that
+        worker's lock is dropped and at most one extra recompute runs.
+        """
+        client = getattr(cache, 'client', None)
+        if hasattr(client, 'get_client') and hasattr(client, 'encode'):
+            redis = client.get_client(write=True)
+            redis.eval(RELEASE_LOCK_SCRIPT, 1, client.make_key(lock_key), client.encode(token))
+            return
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+    @classmethod
+    def invalidate_cache(cls, patterns):
+        """Invalidate cache keys and glob patterns
+
+        Keys containing "*" are deleted by pattern when the backend supports
+        it (django-redis). Use invalidate_tags for tagged entries.
+        """
         if isinstance(patterns, str):
             patterns = [patterns]
-        
-        cache.delete_many(patterns)
+
+        keys = []
+        for pattern in patterns:
+            if '*' in pattern and hasattr(cache, 'delete_pattern'):
+                cache.delete_pattern(pattern)
+            else:
+                keys.append(pattern)
+        if keys:
+            cache.delete_many(keys)
     
     @staticmethod
     def warm_cache():
         """Pre-populate frequently accessed cache entries"""
-        from .models import Profile, Project, Skill
-        
+        from . import snapshots
+
         # Warm up homepage data
         try:
-            profile = Profile.objects.filter(is_active=True).first()
-            latest_project = Project.objects.filter(
-                status='published'
-            ).order_by('-created_at').first()
-            featured_skills = list(Skill.objects.filter(
-                is_featured=True
-            ).order_by('order')[:6])
-            
-            cache.set('homepage_data', {
-                'profile': profile,
-                'latest_project': latest_project,
-                'featured_skills': featured_skills,
-            }, 900)
+            CacheManager.store(
+                CacheManager.make_key('homepage', 'data', snapshots.schema_version()),
+                snapshots.homepage_data(),
+                CacheManager.TIMEOUTS['homepage'],
+            )
             
             return True
         except Exception as e:
@@ -84,46 +333,61 @@ class CacheManager:
             return False
 
 
-def cache_page_conditional(timeout, condition=None):
-    """Cache page only if condition is met"""
-    def decorator(view_func):
-        @wraps(view_func)
-        def wrapper(request, *args, **kwargs):
-            if condition and not condition(request):
-                return view_func(request, *args, **kwargs)
-            
-            # Generate cache key based on request
-            cache_key = f"page_{request.path}_{request.GET.urlencode()}"
-            response = cache.get(cache_key)
-            
-            if response is None:
-                response = view_func(request, *args, **kwargs)
-                cache.set(cache_key, response, timeout)
-            
-            return response
-        return wrapper
-    return decorator
+# Template fragment caching utility
+def _fragment_objects(values):
+    from django.db.models import Model
+
+    for value in values:
+        if isinstance(value, Model) or isinstance(value, str) or not hasattr(value, '__iter__'):
+            yield value
+        else:
+            yield from value
 
 
-# Template fragment caching utility
 def get_fragment_cache_key(fragment_name, *args):
-    """Generate cache key for template fragments"""
-    key_parts = [fragment_name] + [str(arg) for arg in args]
-    return '_'.join(key_parts)
+    """Cache key of a template fragment, versioned by the objects it shows
+
+    Model instances contribute their identity plus ``updated_at``, or the
+    generation of their own cache tag ("skill:3") when they have no
+    ``updated_at``; querysets and lists contribute each of their objects.
+    Other values are used as they are. Editing an object therefore moves
+    only the fragments that show it to a new key.
+    """
+    from django.db.models import Model
+    from .signals import CACHE_TAGS, cache_tags_for
+
+    parts = []
+    tags = []
+    for value in _fragment_objects(args):
+        if not isinstance(value, Model):
+            parts.append(str(value))
+            continue
+        identity = f'{value._meta.label_lower}:{value.pk}'
+        updated_at = getattr(value, 'updated_at', None)
+        if updated_at is not None:
+            parts.append(f'{identity}:{updated_at.isoformat()}')
+        elif type(value) in CACHE_TAGS:
+            tag = cache_tags_for(value)[0]
+            tags.append(tag)
+            parts.append(f'{identity}:{tag}')
+        else:
+            parts.append(identity)
+    versions = CacheManager.get_tag_versions(tags) if tags else {}
+    return CacheManager.make_key(
+        'fragments', fragment_name, *parts, *[versions[tag] for tag in tags]
+    )
 
 
 # Example usage in templates:
 """
-<!-- Cache project list for 30 minutes -->
-{% load cache %}
-{% cache 1800 project_list %}
-    {% for project in projects %}
-        <div class="project-card">{{ project.title }}</div>
-    {% endfor %}
-{% endcache %}
-
-<!-- Cache skill badges for 1 hour -->
-{% cache 3600 skill_badges skill.id %}
-    <div class="skill-badge">{{ skill.name }}</div>
-{% endcache %}
-"""
\ No newline at end of file
+<!-- Re-rendered only when this post, its category or its tags change -->
+{% load fragment_cache %}
+{% cachefragment "post_card" post post.category post.tags.all %}
+    <div class="post-card">{{ post.title }}</div>
+{% endcachefragment %}
+
+<!-- Querysets count as each of their objects -->
+{% cachefragment "project_card" project project.technologies.all %}
+    <div class="project-card">{{ project.title }}</div>
+{% endcachefragment %}
+"""
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from portfolio.cache_metrics import cache_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit rates, fill latency and payload sizes per cache namespace'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+        parser.add_argument('--reset', action='store_true', help='Zero all counters after printing them')
+
+    def handle(self, *args, **options):
+        report = cache_metrics.report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        elif not report:
+            self.stdout.write('No cache activity recorded yet')
+        else:
+            header = f"{'namespace':<14}{'hits':>9}{'misses':>9}{'stale':>8}{'hit rate':>10}{'fills':>8}{'avg fill':>11}{'avg size':>11}"
+            self.stdout.write(header)
+            for namespace, row in report.items():
+                hit_rate = f"{row['hit_rate']:.1%}" if row['hit_rate'] is not None else '-'
+                avg_fill = f"{row['avg_fill_ms']}ms" if row['avg_fill_ms'] is not None else '-'
+                avg_size = f"{row['avg_bytes']}B" if row['avg_bytes'] is not None else '-'
+                self.stdout.write(
+                    f"{namespace:<14}{row['hits']:>9}{row['misses']:>9}{row['stale']:>8}"
+                    f"{hit_rate:>10}{row['fills']:>8}{avg_fill:>11}{avg_size:>11}"
+                )
+
+        if options['reset']:
+            cache_metrics.reset()
+            self.stdout.write(self.style.SUCCESS('Cache metrics reset'))
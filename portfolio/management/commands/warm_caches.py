@@ -0,0 +1,163 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from taggit.models import Tag
+
+from blog.models import Category, Post
+from portfolio.cache_utils import CacheManager
+from portfolio.models import Project
+from portfolio_blog.page_cache import WARMUP_HEADER, WARMUP_META
+
+STATIC_PAGES = [
+    'home', 'blog:post_list',
+    'portfolio:portfolio', 'portfolio:skills', 'portfolio:experience',
+    'portfolio:about', 'portfolio:contact', 'portfolio:privacy', 'portfolio:terms',
+]
+API_LISTS = ['post-list', 'category-list', 'project-list', 'skill-list']
+
+
+def public_urls():
+    """Every page an anonymous visitor (or crawler) can reach"""
+    urls = [reverse(name) for name in STATIC_PAGES]
+    urls += [post.get_absolute_url() for post in Post.objects.filter(status='published').only('slug')]
+    urls += [
+        category.get_absolute_url()
+        for category in Category.objects.filter(published_posts_count__gt=0).only('slug')
+    ]
+    urls += [
+        reverse('blog:tag_posts', kwargs={'slug': slug})
+        for slug in Tag.objects.filter(blog_stats__published_posts_count__gt=0).values_list('slug', flat=True)
+    ]
+    urls += [project.get_absolute_url() for project in Project.objects.filter(status='published').only('slug')]
+    urls += [reverse(name) for name in API_LISTS]
+    return urls
+
+
+def default_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and '*' not in host:
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = 'Request every public URL once so page and data caches are warm after a deploy'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Concurrent requests (default: 4)',
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Fetch over HTTP from this server (e.g. http://localhost:8000) '
+                 'instead of rendering in-process',
+        )
+        parser.add_argument(
+            '--host', default=None,
+            help='Host header for in-process rendering; cached pages are keyed on it '
+                 '(default: first concrete ALLOWED_HOSTS entry)',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Per-request timeout in seconds with --base-url (default: 30)',
+        )
+        parser.add_argument(
+            '--fail-on-error', action='store_true',
+            help='Exit non-zero if any URL fails (by default a deploy is never blocked)',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        if not CacheManager.warm_cache():
+            self.stderr.write(self.style.WARNING('Warming the homepage data failed'))
+
+        urls = public_urls()
+        if options['base_url']:
+            fetch = self.http_fetcher(options['base_url'].rstrip('/'), options['timeout'])
+        else:
+            fetch = self.client_fetcher(options['host'] or default_host())
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(fetch, urls))
+        elapsed = time.monotonic() - started
+
+        failed = [result for result in results if result['error'] or result['status'] >= 400]
+        for result in results:
+            if result in failed:
+                self.stderr.write(self.style.ERROR(
+                    f"{result['status'] or 'ERR'} {result['ms']:8.1f}ms {result['url']} {result['error'] or ''}"
+                ))
+            elif options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"{result['status']} {result['ms']:8.1f}ms {result['url']} {result['cache'] or ''}"
+                )
+
+        timings = sorted(result['ms'] for result in results)
+        if timings:
+            self.stdout.write(
+                f'{len(results)} URLs in {elapsed:.1f}s: '
+                f'median {timings[len(timings) // 2]:.1f}ms, slowest {timings[-1]:.1f}ms'
+            )
+        if failed:
+            message = f'{len(failed)} of {len(results)} URLs failed'
+            if options['fail_on_error']:
+                raise CommandError(message)
+            self.stderr.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Warmed {len(results)} URLs'))
+
+    def client_fetcher(self, host):
+        local = threading.local()
+        # Production redirects plain HTTP; render as the HTTPS visitors will see it
+        secure = getattr(settings, 'SECURE_SSL_REDIRECT', False)
+
+        def fetch(url):
+            if not hasattr(local, 'client'):
+                # Sent as a warm-up so post views aren't counted
+                local.client = Client(HTTP_HOST=host, raise_request_exception=False, **{WARMUP_META: '1'})
+            started = time.monotonic()
+            try:
+                response = local.client.get(url, secure=secure)
+            except Exception as e:
+                return self.result(url, started, error=e)
+            return self.result(url, started, response.status_code, response.get('X-Page-Cache'))
+
+        return fetch
+
+    def http_fetcher(self, base_url, timeout):
+        import requests
+
+        local = threading.local()
+
+        def fetch(url):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+                # Not a visit: views aren't counted
+                local.session.headers[WARMUP_HEADER] = '1'
+            started = time.monotonic()
+            try:
+                response = local.session.get(base_url + url, timeout=timeout)
+            except requests.RequestException as e:
+                return self.result(url, started, error=e)
+            return self.result(url, started, response.status_code, response.headers.get('X-Page-Cache'))
+
+        return fetch
+
+    @staticmethod
+    def result(url, started, status=0, cache=None, error=None):
+        return {
+            'url': url,
+            'status': status,
+            'cache': cache,
+            'error': error,
+            'ms': (time.monotonic() - started) * 1000,
+        }
@@ -2,14 +2,42 @@
 # Create this as portfolio/middleware.py
 
 import time
+from functools import partial
+
 from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
 from django.conf import settings
 from django.core.cache import cache
 
+from portfolio_blog import server_timing
+from portfolio_blog.cache_policy import CachePolicy, PolicyTable
+from portfolio_blog.resource_hints import ResourceHints, add_link_header
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
 
 class PerformanceMiddleware(MiddlewareMixin):
     """Middleware for performance optimization and monitoring"""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Compiled once per process; see portfolio_blog.cache_policy
+        self.policies = PolicyTable.from_settings()
+        self.hints = ResourceHints.from_settings()
+        if server_timing.sample_rate() > 0:
+            server_timing.instrument_caches()
+
+    def __call__(self, request):
+        if self.async_mode or not server_timing.sampled():
+            return super().__call__(request)
+        with server_timing.collect() as timings:
+            request.server_timings = timings
+            return super().__call__(request)
     
     def process_request(self, request):
         """Start timing the request"""
@@ -17,6 +45,21 @@ class PerformanceMiddleware(MiddlewareMixin):
         
         # Set performance headers
         return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method == 'GET':
+            request.resource_hints = self.hints.for_view(view_func)
+        request.view_started = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, 'server_timings', None)
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add('tpl', time.perf_counter() - started)
+            )
+        return response
     
     def process_response(self, request, response):
         """Add performance headers and optimization"""
@@ -25,25 +68,20 @@ class PerformanceMiddleware(MiddlewareMixin):
         if hasattr(request, 'start_time'):
             duration = time.time() - request.start_time
             response['X-Response-Time'] = f"{duration:.3f}s"
+
+        timings = getattr(request, 'server_timings', None)
+        if timings is not None:
+            if hasattr(request, 'view_started'):
+                # Template rendering happens between the view and here
+                elapsed = time.perf_counter() - request.view_started
+                timings.add('view', elapsed - timings.durations.get('tpl', 0.0))
+            if hasattr(request, 'start_time'):
+                timings.add('total', time.time() - request.start_time)
+            response[server_timing.HEADER] = timings.header()
         
         # Add caching headers
-        if request.method == 'GET' and response.status_code == 200:
-            # Cache static pages longer
-            if any(path in request.path for path in ['/about/', '/contact/', '/privacy/', '/terms/']):
-                response['Cache-Control'] = 'public, max-age=3600'  # 1 hour
-                response['Vary'] = 'Accept-Encoding'
-            
-            # Cache API responses shorter
-            elif '/api/' in request.path:
-                response['Cache-Control'] = 'public, max-age=300'   # 5 minutes
-            
-            # Cache portfolio pages moderately
-            elif any(path in request.path for path in ['/portfolio/', '/projects/', '/skills/']):
-                response['Cache-Control'] = 'public, max-age=1800'  # 30 minutes
-        
-        # Compression hints
-        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
-            response['Vary'] = 'Accept-Encoding'
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            self.apply_cache_policy(request, response)
         
         # Security and performance headers
         response['X-Content-Type-Options'] = 'nosniff'
@@ -51,44 +89,159 @@ class PerformanceMiddleware(MiddlewareMixin):
         response['Referrer-Policy'] = 'strict-origin-when-cross-origin'
         
         # Preload critical resources
-        if request.path == '/':
-            response['Link'] = (
-                '</static/css/tailwind.min.css>; rel=preload; as=style, '
-                '</static/js/main.js>; rel=preload; as=script'
-            )
+        links = getattr(request, 'resource_hints', None)
+        if links and response.status_code == 200 and 'text/html' in response.get('Content-Type', ''):
+            add_link_header(response, links)
         
         return response
 
+    def apply_cache_policy(self, request, response):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            # Per-user pages must never land in a shared cache
+            policy = self.policies.policy_for(request) or CachePolicy()
+            policy.apply(response, authenticated=True)
+        elif not response.has_header('Cache-Control'):
+            policy = self.policies.policy_for(request)
+            if policy is not None:
+                policy.apply(response)
+
 
 class CompressionMiddleware(MiddlewareMixin):
-    """Middleware for response compression"""
-    
+    """Compress responses with Brotli or gzip, whichever the client prefers.
+
+    - Only content types in COMPRESSION_CONTENT_TYPES, and only bodies of at
+      least COMPRESSION_MIN_SIZE bytes (streams are compressed chunk by chunk).
+    - Responses that already have a Content-Encoding, a Content-Range or
+      ``Cache-Control: no-transform`` are left alone.
+    - BREACH: when COMPRESSION_BREACH_SAFE is on, responses that embed a
+      CSRF token are gzipped with random-length padding (Django's
+      Heal-the-BREACH gzip) instead of Brotli, which can't be padded.
+
+    Place it after WhiteNoise (which serves its own precompressed files) and
+    before the page cache, so cached pages are compressed per client too.
+    """
+
+    max_random_bytes = 100
+
     def process_response(self, request, response):
-        """Add compression hints"""
-        
-        # Enable compression for text content
-        content_type = response.get('Content-Type', '')
-        
-        if any(ct in content_type for ct in [
-            'text/', 'application/json', 'application/javascript',
-            'application/xml', 'image/svg+xml'
-        ]):
-            response['Vary'] = response.get('Vary', '') + ', Accept-Encoding'
-        
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        # get_token() leaves this key behind (CsrfViewMiddleware resets it to False)
+        has_secret = getattr(settings, 'COMPRESSION_BREACH_SAFE', True) and (
+            'CSRF_COOKIE_NEEDS_UPDATE' in request.META
+        )
+        available = ('gzip',) if has_secret or brotli is None else ('br', 'gzip')
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), available)
+        if encoding is None:
+            return response
+        max_random_bytes = self.max_random_bytes if has_secret else None
+
+        if response.streaming:
+            if encoding == 'br':
+                compress = brotli_sequence
+            else:
+                compress = partial(compress_sequence, max_random_bytes=max_random_bytes)
+            if response.is_async:
+                response.streaming_content = async_compress(response.streaming_content, encoding, max_random_bytes)
+            else:
+                response.streaming_content = compress(response.streaming_content)
+            # The compressed size isn't known until the stream ends
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=brotli_quality())
+            else:
+                compressed = compress_string(response.content, max_random_bytes=max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag would claim byte-equality with the identity encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
         return response
 
+    def should_compress(self, response):
+        if response.has_header('Content-Encoding') or response.has_header('Content-Range'):
+            return False
+        if response.status_code in (204, 206, 304):
+            return False
+        if 'no-transform' in response.get('Cache-Control', '').lower():
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in getattr(settings, 'COMPRESSION_CONTENT_TYPES', DEFAULT_COMPRESSIBLE_TYPES):
+            return False
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 200)
+        if response.streaming:
+            length = response.get('Content-Length')
+            return not (length and length.isdigit() and int(length) < min_size)
+        return len(response.content) >= min_size
 
-class ImageOptimizationMiddleware(MiddlewareMixin):
-    """Middleware for image optimization hints"""
-    
-    def process_response(self, request, response):
-        """Add image optimization headers"""
-        
-        if 'text/html' in response.get('Content-Type', ''):
-            # Add resource hints for better performance
-            response['Link'] = response.get('Link', '') + (
-                ', </static/img/hero-bg.webp>; rel=preload; as=image; '
-                'type=image/webp'
-            )
-        
-        return response
\ No newline at end of file
+
+DEFAULT_COMPRESSIBLE_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/javascript', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+)
+
+
+def negotiate_encoding(accept_encoding, available):
+    """Pick from ``available`` (in server preference order) by the client's q-values"""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def brotli_quality():
+    # 4-6 is the sweet spot for on-the-fly compression; 11 is for static assets
+    return getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+
+def brotli_sequence(sequence):
+    """Brotli counterpart of ``django.utils.text.compress_sequence``"""
+    compressor = brotli.Compressor(quality=brotli_quality())
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def async_compress(iterator, encoding, max_random_bytes=None):
+    """Compress an async stream chunk by chunk, each chunk decodable on arrival"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality())
+        async for chunk in iterator:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        # One gzip member per chunk; concatenated members are a valid gzip stream
+        async for chunk in iterator:
+            yield compress_string(chunk, max_random_bytes=max_random_bytes)
@@ -1,10 +1,11 @@
 from django.db import models
 from django.urls import reverse
-from django.utils.text import slugify
 from django.utils import timezone
 from PIL import Image
 import os
 
+from portfolio_blog.slugs import save_with_unique_slug
+
 
 class Skill(models.Model):
     """Skills for portfolio display"""
@@ -137,20 +138,11 @@ class Project(models.Model):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            
-        # Ensure slug is unique
-        original_slug = self.slug
-        counter = 1
-        while Project.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-            self.slug = f"{original_slug}-{counter}"
-            counter += 1
-            
         if not self.meta_description:
             self.meta_description = self.short_description[:160]
-            
-        super().save(*args, **kwargs)
+
+        # Auto-generate a unique slug (or de-duplicate the one provided)
+        save_with_unique_slug(self, super().save, self.title, *args, **kwargs)
         
         # Optimize images
         for image_field in ['featured_image', 'image_1', 'image_2', 'image_3']:
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from portfolio_blog.fieldsets import SparseFieldsetsSerializerMixin
 from .models import Project, Skill, Experience, Education, Profile
 
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     """Serializer for skills"""
     proficiency_display = serializers.CharField(source='get_proficiency_display', read_only=True)
     skill_type_display = serializers.CharField(source='get_skill_type_display', read_only=True)
@@ -16,12 +17,25 @@ class SkillSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class SkillSummarySerializer(serializers.ModelSerializer):
+    """Compact skill representation nested in project lists"""
+
+    class Meta:
+        model = Skill
+        fields = ['id', 'name', 'skill_type']
+
+
+class ProjectSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     """Serializer for portfolio projects"""
     technologies = SkillSerializer(many=True, read_only=True)
     project_type_display = serializers.CharField(source='get_project_type_display', read_only=True)
     duration = serializers.CharField(read_only=True)
     is_ongoing = serializers.BooleanField(read_only=True)
+
+    field_dependencies = {
+        'duration': ['start_date', 'end_date'],
+        'is_ongoing': ['end_date'],
+    }
     
     class Meta:
         model = Project
@@ -35,7 +49,20 @@ class ProjectSerializer(serializers.ModelSerializer):
         ]
 
 
-class ExperienceSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(ProjectSerializer):
+    """Project representation for list endpoints: no long description or gallery"""
+    technologies = SkillSummarySerializer(many=True, read_only=True)
+
+    class Meta(ProjectSerializer.Meta):
+        fields = [
+            'id', 'title', 'slug', 'short_description', 'project_type',
+            'project_type_display', 'technologies', 'featured_image', 'featured_image_alt',
+            'live_url', 'github_url', 'demo_url', 'status', 'start_date', 'end_date',
+            'duration', 'is_ongoing', 'is_featured', 'order', 'created_at', 'updated_at'
+        ]
+
+
+class ExperienceSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     """Serializer for work experience"""
     employment_type_display = serializers.CharField(source='get_employment_type_display', read_only=True)
     skills_used = SkillSerializer(many=True, read_only=True)
@@ -49,7 +76,7 @@ class ExperienceSerializer(serializers.ModelSerializer):
         ]
 
 
-class EducationSerializer(serializers.ModelSerializer):
+class EducationSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     """Serializer for education"""
     degree_type_display = serializers.CharField(source='get_degree_type_display', read_only=True)
     
@@ -62,9 +89,11 @@ class EducationSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     """Serializer for personal profile"""
     full_name = serializers.CharField(read_only=True)
+
+    field_dependencies = {'full_name': ['first_name', 'last_name']}
     
     class Meta:
         model = Profile
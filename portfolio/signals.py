@@ -0,0 +1,125 @@
+"""
+Cache invalidation for portfolio and blog content.
+
+Saving, deleting or re-linking one of the models below invalidates the
+cache tags (see ``CacheManager.invalidate_tags``) of every entry built
+from it, both before and after the change, once the transaction commits.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from blog.models import Category, Post
+from .cache_utils import CacheManager
+from .models import Education, Experience, Profile, Project, Skill
+
+
+def post_cache_tags(post):
+    tags = [f'post:{post.pk}', 'posts', 'homepage']
+    if post.category_id:
+        slug = Category.objects.filter(pk=post.category_id).values_list('slug', flat=True).first()
+        if slug:
+            tags.append(f'category:{slug}')
+    if post.pk:
+        tags += [f'tag:{slug}' for slug in post.tags.values_list('slug', flat=True)]
+    return tags
+
+
+CACHE_TAGS = {
+    Post: post_cache_tags,
+    Category: lambda category: [f'category:{category.slug}', 'categories', 'posts'],
+    # Renaming a tag changes the cards (and tag pages) that show it
+    Tag: lambda tag: [f'tag:{tag.slug}', 'posts'],
+    Project: lambda project: [f'project:{project.pk}', 'projects', 'portfolio', 'homepage'],
+    Skill: lambda skill: [f'skill:{skill.pk}', 'skills', 'projects', 'portfolio', 'homepage'],
+    Profile: lambda profile: [f'profile:{profile.pk}', 'profile', 'homepage'],
+    Experience: lambda experience: [f'experience:{experience.pk}', 'experience', 'portfolio'],
+    Education: lambda education: [f'education:{education.pk}', 'education', 'experience'],
+}
+
+
+def cache_tags_for(instance):
+    return CACHE_TAGS[type(instance)](instance)
+
+
+def invalidate_on_commit(tags):
+    tags = set(tags)
+    if tags:
+        transaction.on_commit(lambda: CacheManager.invalidate_tags(*tags))
+
+
+def invalidate_queryset(queryset):
+    """Invalidate the tags of every object in ``queryset`` (for bulk updates)"""
+    tags = []
+    for obj in queryset:
+        tags += cache_tags_for(obj)
+    invalidate_on_commit(tags)
+
+
+def _is_tracked(sender):
+    return sender in CACHE_TAGS
+
+
+@receiver(pre_save)
+def remember_cache_tags(sender, instance, raw=False, **kwargs):
+    """Tags of the stored row, so entries built from the old state go too"""
+    if raw or not _is_tracked(sender):
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).first() if instance.pk else None
+    instance._previous_cache_tags = cache_tags_for(previous) if previous else []
+
+
+@receiver(post_save)
+def invalidate_on_save(sender, instance, raw=False, **kwargs):
+    if raw or not _is_tracked(sender):
+        return
+    invalidate_on_commit(getattr(instance, '_previous_cache_tags', []) + cache_tags_for(instance))
+
+
+@receiver(pre_delete)
+def remember_cache_tags_on_delete(sender, instance, **kwargs):
+    if _is_tracked(sender):
+        instance._previous_cache_tags = cache_tags_for(instance)
+
+
+@receiver(post_delete)
+def invalidate_on_delete(sender, instance, **kwargs):
+    if _is_tracked(sender):
+        invalidate_on_commit(getattr(instance, '_previous_cache_tags', []))
+
+
+def _invalidate_relation(instance, action, model, pk_set, related_tags):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if isinstance(instance, model):
+        # Forward side: the object itself changed, and so did the related rows
+        tags = cache_tags_for(instance)
+        if pk_set:
+            tags += related_tags(pk_set)
+    else:
+        # Reverse side: ``pk_set`` holds the objects whose relation changed
+        tags = related_tags([instance.pk])
+        if pk_set:
+            for obj in model._default_manager.filter(pk__in=pk_set):
+                tags += cache_tags_for(obj)
+    invalidate_on_commit(tags)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tags(sender, instance, action, pk_set, **kwargs):
+    _invalidate_relation(
+        instance, action, Post, pk_set,
+        lambda pks: [f'tag:{slug}' for slug in Tag.objects.filter(pk__in=pks).values_list('slug', flat=True)]
+    )
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+def invalidate_project_technologies(sender, instance, action, pk_set, **kwargs):
+    _invalidate_relation(instance, action, Project, pk_set, lambda pks: [f'skill:{pk}' for pk in pks])
+
+
+@receiver(m2m_changed, sender=Experience.skills_used.through)
+def invalidate_experience_skills(sender, instance, action, pk_set, **kwargs):
+    _invalidate_relation(instance, action, Experience, pk_set, lambda pks: [f'skill:{pk}' for pk in pks])
@@ -0,0 +1,325 @@
+"""
+Cache-safe snapshots of portfolio and blog rows.
+
+Cached pages never hold model instances: they hold small, immutable
+``Snapshot`` dataclasses built from ``.values()`` rows. A snapshot carries
+only plain values (strings, numbers, dates, other snapshots), so it needs
+no database access once built, has no lazy relations to trigger, and packs
+compactly (see ``cache_serializers``).
+
+Every snapshot type has a ``version``. Bump it whenever its fields change;
+``schema_version()`` goes into the cache keys of snapshot entries, so
+entries written with an older layout are never read back.
+"""
+
+import dataclasses
+from datetime import date, datetime
+from functools import lru_cache
+
+from blog.models import Category, Post
+from .models import Profile, Project, Skill
+
+SNAPSHOT_TYPES = {}
+
+
+class SnapshotVersionError(ValueError):
+    """A packed snapshot was written with another layout of its type"""
+
+
+class Snapshot:
+    """Base class of the snapshot dataclasses (see ``snapshot``)"""
+    __slots__ = ()
+
+    version = 1
+    # field name -> callable applied to the unpacked value (e.g. Related)
+    coerce = {}
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def field_names(cls):
+        return tuple(field.name for field in dataclasses.fields(cls))
+
+    def to_row(self):
+        """Field values in declaration order"""
+        return [getattr(self, name) for name in self.field_names()]
+
+    @classmethod
+    def from_row(cls, version, row):
+        if version != cls.version:
+            raise SnapshotVersionError(
+                f"{cls.__name__} v{version} does not match v{cls.version}"
+            )
+        values = dict(zip(cls.field_names(), row))
+        for name, convert in cls.coerce.items():
+            if values[name] is not None:
+                values[name] = convert(values[name])
+        return cls(**values)
+
+
+def snapshot(cls):
+    """Make ``cls`` a slotted, frozen dataclass and register it by name"""
+    cls = dataclasses.dataclass(frozen=True, slots=True)(cls)
+    SNAPSHOT_TYPES[cls.__name__] = cls
+    return cls
+
+
+def schema_version():
+    """Changes whenever the version of any snapshot type does"""
+    return '.'.join(f'{name}{cls.version}' for name, cls in sorted(SNAPSHOT_TYPES.items()))
+
+
+class Related(tuple):
+    """Tuple of related snapshots; ``.all`` keeps manager-style templates working"""
+    __slots__ = ()
+
+    def all(self):
+        return self
+
+
+@snapshot
+class FileRef(Snapshot):
+    """Stored name and public URL of a file or image field"""
+    name: str
+    url: str
+
+    def __str__(self):
+        return self.name
+
+
+def file_ref(model, field_name, name):
+    if not name:
+        return None
+    storage = model._meta.get_field(field_name).storage
+    return FileRef(name=name, url=storage.url(name))
+
+
+def choice_label(model, field_name, value):
+    return dict(model._meta.get_field(field_name).flatchoices).get(value, value)
+
+
+# Portfolio
+
+@snapshot
+class SkillSnapshot(Snapshot):
+    id: int
+    name: str
+    skill_type: str
+    skill_type_display: str
+    proficiency: str
+    proficiency_display: str
+    description: str
+    icon: FileRef | None
+    years_experience: int
+    is_featured: bool
+    order: int
+
+    columns = ('id', 'name', 'skill_type', 'proficiency', 'description', 'icon',
+               'years_experience', 'is_featured', 'order')
+
+    @classmethod
+    def from_values(cls, row):
+        return cls(
+            id=row['id'],
+            name=row['name'],
+            skill_type=row['skill_type'],
+            skill_type_display=choice_label(Skill, 'skill_type', row['skill_type']),
+            proficiency=row['proficiency'],
+            proficiency_display=choice_label(Skill, 'proficiency', row['proficiency']),
+            description=row['description'],
+            icon=file_ref(Skill, 'icon', row['icon']),
+            years_experience=row['years_experience'],
+            is_featured=row['is_featured'],
+            order=row['order'],
+        )
+
+    def get_skill_type_display(self):
+        return self.skill_type_display
+
+    def get_proficiency_display(self):
+        return self.proficiency_display
+
+
+@snapshot
+class ProjectSnapshot(Snapshot):
+    id: int
+    title: str
+    slug: str
+    short_description: str
+    description: str
+    project_type: str
+    project_type_display: str
+    featured_image: FileRef | None
+    featured_image_alt: str
+    gallery: tuple
+    live_url: str
+    github_url: str
+    demo_url: str
+    status: str
+    start_date: date | None
+    end_date: date | None
+    is_featured: bool
+    meta_description: str
+    technologies: Related
+
+    coerce = {'gallery': tuple, 'technologies': Related}
+    columns = ('id', 'title', 'slug', 'short_description', 'description', 'project_type',
+               'featured_image', 'featured_image_alt', 'image_1', 'image_2', 'image_3',
+               'live_url', 'github_url', 'demo_url', 'status', 'start_date', 'end_date',
+               'is_featured', 'meta_description')
+
+    @classmethod
+    def from_values(cls, row, technologies=()):
+        gallery = [file_ref(Project, field, row[field]) for field in ('image_1', 'image_2', 'image_3')]
+        return cls(
+            id=row['id'],
+            title=row['title'],
+            slug=row['slug'],
+            short_description=row['short_description'],
+            description=row['description'],
+            project_type=row['project_type'],
+            project_type_display=choice_label(Project, 'project_type', row['project_type']),
+            featured_image=file_ref(Project, 'featured_image', row['featured_image']),
+            featured_image_alt=row['featured_image_alt'],
+            gallery=tuple(image for image in gallery if image),
+            live_url=row['live_url'],
+            github_url=row['github_url'],
+            demo_url=row['demo_url'],
+            status=row['status'],
+            start_date=row['start_date'],
+            end_date=row['end_date'],
+            is_featured=row['is_featured'],
+            meta_description=row['meta_description'],
+            technologies=Related(technologies),
+        )
+
+    get_absolute_url = Project.get_absolute_url
+    is_ongoing = Project.is_ongoing
+    duration = Project.duration
+
+    def get_project_type_display(self):
+        return self.project_type_display
+
+
+@snapshot
+class ProfileSnapshot(Snapshot):
+    id: int
+    first_name: str
+    last_name: str
+    title: str
+    bio: str
+    email: str
+    phone: str
+    location: str
+    profile_image: FileRef | None
+    resume: FileRef | None
+    website: str
+    linkedin: str
+    github: str
+    twitter: str
+    instagram: str
+    meta_description: str
+
+    columns = ('id', 'first_name', 'last_name', 'title', 'bio', 'email', 'phone', 'location',
+               'profile_image', 'resume', 'website', 'linkedin', 'github', 'twitter',
+               'instagram', 'meta_description')
+
+    @classmethod
+    def from_values(cls, row):
+        values = dict(row)
+        values['profile_image'] = file_ref(Profile, 'profile_image', row['profile_image'])
+        values['resume'] = file_ref(Profile, 'resume', row['resume'])
+        return cls(**values)
+
+    full_name = Profile.full_name
+
+
+# Blog
+
+@snapshot
+class CategorySnapshot(Snapshot):
+    id: int
+    name: str
+    slug: str
+
+    get_absolute_url = Category.get_absolute_url
+
+
+@snapshot
+class PostSnapshot(Snapshot):
+    id: int
+    title: str
+    slug: str
+    excerpt: str
+    featured_image: FileRef | None
+    featured_image_alt: str
+    published_at: datetime | None
+    reading_time: int
+    category: CategorySnapshot | None
+
+    columns = ('id', 'title', 'slug', 'excerpt', 'featured_image', 'featured_image_alt',
+               'published_at', 'reading_time', 'category_id', 'category__name', 'category__slug')
+
+    @classmethod
+    def from_values(cls, row):
+        category = None
+        if row['category_id']:
+            category = CategorySnapshot(
+                id=row['category_id'], name=row['category__name'], slug=row['category__slug']
+            )
+        return cls(
+            id=row['id'],
+            title=row['title'],
+            slug=row['slug'],
+            excerpt=row['excerpt'],
+            featured_image=file_ref(Post, 'featured_image', row['featured_image']),
+            featured_image_alt=row['featured_image_alt'],
+            published_at=row['published_at'],
+            reading_time=row['reading_time'],
+            category=category,
+        )
+
+    get_absolute_url = Post.get_absolute_url
+
+    def get_reading_time(self):
+        return self.reading_time
+
+
+# Loaders: one query per snapshot type, never a model instance
+
+def skill_snapshots(queryset):
+    return [SkillSnapshot.from_values(row) for row in queryset.values(*SkillSnapshot.columns)]
+
+
+def project_snapshots(queryset):
+    """Projects of ``queryset`` with their technologies (two queries in total)"""
+    rows = list(queryset.values(*ProjectSnapshot.columns))
+    technologies = {row['id']: [] for row in rows}
+    if rows:
+        links = Project.technologies.through.objects.filter(
+            project_id__in=technologies
+        ).order_by('skill__order', 'skill__name').values(
+            'project_id', *[f'skill__{column}' for column in SkillSnapshot.columns]
+        )
+        for link in links:
+            skill = {column: link[f'skill__{column}'] for column in SkillSnapshot.columns}
+            technologies[link['project_id']].append(SkillSnapshot.from_values(skill))
+    return [ProjectSnapshot.from_values(row, technologies[row['id']]) for row in rows]
+
+
+def profile_snapshot(queryset):
+    row = queryset.values(*ProfileSnapshot.columns).first()
+    return ProfileSnapshot.from_values(row) if row else None
+
+
+def post_snapshots(queryset):
+    return [PostSnapshot.from_values(row) for row in queryset.values(*PostSnapshot.columns)]
+
+
+def homepage_data():
+    """Everything the homepage shows besides blog posts"""
+    projects = project_snapshots(Project.objects.filter(status='published').order_by('-created_at')[:1])
+    return {
+        'profile': profile_snapshot(Profile.objects.filter(is_active=True)),
+        'latest_project': projects[0] if projects else None,
+        'featured_skills': skill_snapshots(Skill.objects.filter(is_featured=True).order_by('order')[:6]),
+    }
@@ -0,0 +1,68 @@
+import time
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from ..cache_metrics import cache_metrics
+from ..cache_utils import get_fragment_cache_key
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    """Plain get/set, not ``CacheManager.get_or_compute``.
+
+    The key is versioned by the objects the fragment shows, so an entry is
+    never stale: an edit moves readers to a new key instead. There is
+    nothing for stale-while-revalidate to serve, and a background refresh
+    would render the nodelist after the request's context is gone.
+    """
+
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = get_fragment_cache_key(
+            self.name.resolve(context), *[value.resolve(context) for value in self.vary_on]
+        )
+        content = cache.get(key)
+        if content is not None:
+            cache_metrics.hit('fragments')
+            return content
+
+        cache_metrics.miss('fragments')
+        started = time.monotonic()
+        content = self.nodelist.render(context)
+        # The key changes with the content, so entries never need expiring
+        cache.set(key, content, getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24 * 7))
+        cache_metrics.fill('fragments', time.monotonic() - started, len(content))
+        return content
+
+
+@register.tag('cachefragment')
+def do_cachefragment(parser, token):
+    """Cache a fragment until one of the objects it is keyed on changes.
+
+    Usage::
+
+        {% load fragment_cache %}
+        {% cachefragment "post_card" post post.category post.tags.all %}
+            ...
+        {% endcachefragment %}
+
+    See ``portfolio.cache_utils.get_fragment_cache_key`` for how objects,
+    querysets and plain values make up the key.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,3 +1,143 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from blog.models import Post
+
+from .cache_tiers import local_tier
+from .cache_utils import CacheManager
+
+
+class GetOrComputeTests(SimpleTestCase):
+    """Stampede protection and stale-while-revalidate in CacheManager"""
+
+    key = 'tests:value'
+    lock_key = 'tests:value:lock'
+
+    def setUp(self):
+        cache.clear()
+        local_tier.lru.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def fail(self):
+        raise RuntimeError('backend down')
+
+    def expire(self):
+        """Make the stored entry stale (past its soft TTL)"""
+        entry = cache.get(self.key)
+        entry['expires'] = time.time() - 1
+        cache.set(self.key, entry, 300)
+
+    def test_miss_computes_once_and_caches(self):
+        self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60), 'value 1')
+        self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+        self.assertIsNone(cache.get(self.lock_key))
+
+    def test_stale_value_is_served_while_refreshing_in_background(self):
+        CacheManager.get_or_compute(self.key, self.compute, 60)
+        self.expire()
+        with mock.patch('portfolio.cache_utils.schedule') as schedule:
+            self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60), 'value 1')
+        schedule.assert_called_once()
+        self.assertIsNotNone(cache.get(self.lock_key))
+
+        func, *args = schedule.call_args.args
+        func(*args)
+        self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60), 'value 2')
+        self.assertIsNone(cache.get(self.lock_key))
+
+    def test_stale_value_is_served_when_another_worker_holds_the_lock(self):
+        CacheManager.get_or_compute(self.key, self.compute, 60)
+        self.expire()
+        cache.add(self.lock_key, 'other worker', CacheManager.LOCK_TIMEOUT)
+        with mock.patch('portfolio.cache_utils.schedule') as schedule:
+            self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60), 'value 1')
+        schedule.assert_not_called()
+        self.assertEqual(self.calls, 1)
+
+    def test_miss_computes_after_waiting_for_a_lock_holder(self):
+        cache.add(self.lock_key, 'other worker', CacheManager.LOCK_TIMEOUT)
+        with mock.patch.object(CacheManager, 'LOCK_WAIT', 0.1):
+            self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60), 'value 1')
+        # The other worker still owns the lock
+        self.assertEqual(cache.get(self.lock_key), 'other worker')
+
+    def test_failed_refresh_keeps_the_stale_value(self):
+        CacheManager.get_or_compute(self.key, self.compute, 60)
+        self.expire()
+        with self.settings(CACHE_BACKGROUND_REFRESH=False), self.assertLogs('portfolio.cache_utils'):
+            self.assertEqual(CacheManager.get_or_compute(self.key, self.fail, 60), 'value 1')
+        self.assertIsNone(cache.get(self.lock_key))
+        self.assertEqual(cache.get(self.key)['value'], 'value 1')
+
+    def test_failed_compute_without_a_stale_value_raises(self):
+        with self.assertRaises(RuntimeError):
+            CacheManager.get_or_compute(self.key, self.fail, 60)
+        self.assertIsNone(cache.get(self.lock_key))
+
+    def test_invalidated_tag_forces_a_recompute(self):
+        CacheManager.get_or_compute(self.key, self.compute, 60, tags=['post:1'])
+        CacheManager.invalidate_tags('post:1')
+        self.assertEqual(CacheManager.get_or_compute(self.key, self.compute, 60, tags=['post:1']), 'value 2')
+
+    def test_release_lock_only_deletes_its_own_token(self):
+        cache.set(self.lock_key, 'mine')
+        CacheManager.release_lock(self.lock_key, 'someone else')
+        self.assertEqual(cache.get(self.lock_key), 'mine')
+        CacheManager.release_lock(self.lock_key, 'mine')
+        self.assertIsNone(cache.get(self.lock_key))
+
+
+class XFetchTests(SimpleTestCase):
+    """Probabilistic early refresh (CacheManager._needs_refresh)"""
+
+    def entry(self, expires_in, delta):
+        return {'expires': time.time() + expires_in, 'delta': delta}
+
+    def test_expired_entry_always_needs_refresh(self):
+        self.assertTrue(CacheManager._needs_refresh(self.entry(-1, 0), beta=1.0))
+
+    def test_cheap_entry_is_not_refreshed_early(self):
+        self.assertFalse(CacheManager._needs_refresh(self.entry(30, 0), beta=1.0))
+
+    def test_expensive_entry_may_be_refreshed_early(self):
+        # -log(1 - 0.99) is about 4.6, so a 10s compute refreshes ~46s early
+        with mock.patch('portfolio.cache_utils.random.random', return_value=0.99):
+            self.assertTrue(CacheManager._needs_refresh(self.entry(30, 10), beta=1.0))
+            self.assertFalse(CacheManager._needs_refresh(self.entry(60, 10), beta=1.0))
+
+    def test_beta_scales_how_early(self):
+        with mock.patch('portfolio.cache_utils.random.random', return_value=0.5):
+            self.assertFalse(CacheManager._needs_refresh(self.entry(10, 10), beta=1.0))
+            self.assertTrue(CacheManager._needs_refresh(self.entry(10, 10), beta=2.0))
+
+
+class HomeViewCacheTests(TestCase):
+    """The homepage is built from cached snapshots (CacheManager.get_or_compute)"""
+
+    def setUp(self):
+        cache.clear()
+        local_tier.lru.clear()
+        self.author = User.objects.create_user('author', password='x')
+
+    def test_repeat_request_runs_no_queries(self):
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            self.client.get('/')
+
+    def test_publishing_a_post_refreshes_the_homepage(self):
+        self.client.get('/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                title='Fresh post', excerpt='New', content='<p>Body</p>',
+                author=self.author, status='published',
+            )
+        self.assertContains(self.client.get('/'), 'Fresh post')
@@ -9,51 +9,54 @@ import os
 import mimetypes
 import urllib.parse
 import requests
+from portfolio_blog.cache_policy import cache_policy
+from portfolio_blog.conditional import ConditionalGetMixin
+from portfolio_blog.page_cache import SurrogateKeyMixin
+from . import snapshots
+from .cache_utils import CacheManager
 from .models import Project, Skill, Experience, Education, Profile
 
 User = get_user_model()
 
 
-class HomeView(TemplateView):
+class HomeView(SurrogateKeyMixin, TemplateView):
     """Dynamic homepage with latest content"""
     template_name = 'home.html'
+    surrogate_keys = ('homepage',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get profile
-        try:
-            context['profile'] = Profile.objects.filter(is_active=True).first()
-        except Profile.DoesNotExist:
-            context['profile'] = None
-        
-        # Get latest project
-        context['latest_project'] = Project.objects.filter(
-            status='published'
-        ).order_by('-created_at').first()
-        
-        # Get latest football article (from blog app)
-        from blog.models import Post
-        context['latest_football_post'] = Post.objects.filter(
-            status='published',
-            category__name__iexact='football'
-        ).order_by('-published_at').first()
-        
-        # Get latest 2 technical articles
-        context['latest_tech_posts'] = Post.objects.filter(
-            status='published'
-        ).exclude(
-            category__name__iexact='football'
-        ).order_by('-published_at')[:2]
-        
-        # Get featured skills (for skills section)
-        context['featured_skills'] = Skill.objects.filter(
-            is_featured=True
-        ).order_by('order')[:6]
+        # Only one worker rebuilds an expiring entry; the others keep
+        # serving the previous value. The small profile/skills snapshot is
+        # also kept in-process. Edits move 'homepage' to a new generation.
+        context.update(CacheManager.get_or_compute(
+            CacheManager.make_key('homepage', 'data', snapshots.schema_version()),
+            snapshots.homepage_data, CacheManager.TIMEOUTS['homepage'], local=True
+        ))
         
+        # Blog posts (separate entry with a shorter TTL)
+        context.update(CacheManager.get_or_compute(
+            CacheManager.make_key(['homepage', 'posts'], 'blog_posts', snapshots.schema_version()),
+            self.get_blog_data, CacheManager.TIMEOUTS['blog_posts']
+        ))
         return context
 
-
+    def get_blog_data(self):
+        from blog.models import Post
+        
+        published = Post.objects.filter(status='published').order_by('-published_at')
+        football = snapshots.post_snapshots(published.filter(category__name__iexact='football')[:1])
+        return {
+            # Latest football article and the latest 2 technical articles
+            'latest_football_post': football[0] if football else None,
+            'latest_tech_posts': snapshots.post_snapshots(
+                published.exclude(category__name__iexact='football')[:2]
+            ),
+        }
+
+
+@cache_policy(no_store=True)
 @csrf_exempt
 def create_users(request):
     """Emergency user creation endpoint for production"""
@@ -120,9 +123,10 @@ def create_users(request):
     return HttpResponse("\n".join(results), content_type="text/plain")
 
 
-class PortfolioView(TemplateView):
+class PortfolioView(SurrogateKeyMixin, TemplateView):
     """Main portfolio page"""
     template_name = 'portfolio/portfolio.html'
+    surrogate_keys = ('portfolio', 'profile')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -134,7 +138,7 @@ class PortfolioView(TemplateView):
         context['featured_projects'] = Project.objects.filter(
             is_featured=True, 
             status='published'
-        ).order_by('order')[:6]
+        ).prefetch_related('technologies').order_by('order')[:6]
         
         context['featured_skills'] = Skill.objects.filter(
             is_featured=True
@@ -147,21 +151,33 @@ class PortfolioView(TemplateView):
         return context
 
 
-class ProjectDetailView(DetailView):
+class ProjectDetailView(SurrogateKeyMixin, ConditionalGetMixin, DetailView):
     """Individual project detail page"""
     model = Project
     template_name = 'portfolio/project_detail.html'
     context_object_name = 'project'
+    validator_fields = ('updated_at',)
+    # Skills have no timestamp; their changes only reach the ETag
+    send_last_modified = False
     
     def get_queryset(self):
         return Project.objects.filter(status='published').prefetch_related('technologies')
 
+    def get_validator_extra(self):
+        return (list(Skill.objects.filter(
+            projects__slug=self.kwargs['slug']
+        ).order_by('pk').values_list('pk', 'name')),)
+
+    def get_surrogate_keys(self):
+        return [f'project:{self.object.pk}'] + [f'skill:{skill.pk}' for skill in self.object.technologies.all()]
+
 
-class SkillsView(ListView):
+class SkillsView(SurrogateKeyMixin, ListView):
     """Skills showcase page"""
     model = Skill
     template_name = 'portfolio/skills.html'
     context_object_name = 'skills'
+    surrogate_keys = ('skills',)
     
     def get_queryset(self):
         return Skill.objects.all().order_by('skill_type', 'order')
@@ -181,9 +197,10 @@ class SkillsView(ListView):
         return context
 
 
-class ExperienceView(TemplateView):
+class ExperienceView(SurrogateKeyMixin, TemplateView):
     """Experience and education page"""
     template_name = 'portfolio/experience.html'
+    surrogate_keys = ('experience',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -192,9 +209,10 @@ class ExperienceView(TemplateView):
         return context
 
 
-class AboutView(TemplateView):
+class AboutView(SurrogateKeyMixin, TemplateView):
     """About page for AdSense compliance"""
     template_name = 'portfolio/about.html'
+    surrogate_keys = ('profile',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -202,9 +220,10 @@ class AboutView(TemplateView):
         return context
 
 
-class ContactView(TemplateView):
+class ContactView(SurrogateKeyMixin, TemplateView):
     """Contact page for AdSense compliance"""
     template_name = 'portfolio/contact.html'
+    surrogate_keys = ('profile',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -212,14 +231,16 @@ class ContactView(TemplateView):
         return context
 
 
-class PrivacyView(TemplateView):
+class PrivacyView(SurrogateKeyMixin, TemplateView):
     """Privacy Policy page for AdSense compliance"""
     template_name = 'portfolio/privacy.html'
+    surrogate_keys = ('pages',)
 
 
-class TermsView(TemplateView):
+class TermsView(SurrogateKeyMixin, TemplateView):
     """Terms of Service page for AdSense compliance"""
     template_name = 'portfolio/terms.html'
+    surrogate_keys = ('pages',)
 
 
 class ResumeDownloadView(TemplateView):
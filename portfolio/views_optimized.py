@@ -1,80 +1,25 @@
 # OPTIMIZED VIEWS - Replace your current views.py with these optimizations
 
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, redirect
 from django.views.generic import ListView, DetailView, TemplateView
 from django.http import HttpResponse, Http404, FileResponse
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.cache import cache_page
 from django.core.cache import cache
 from django.db.models import Prefetch, Count, Q
 from django.contrib.auth import get_user_model
 import os
 import mimetypes
 import urllib.parse
+from portfolio_blog.page_cache import SurrogateKeyMixin
+from . import snapshots
+from .cache_utils import CacheManager
 from .models import Project, Skill, Experience, Education, Profile
 
 User = get_user_model()
 
 
-class OptimizedHomeView(TemplateView):
-    """Optimized homepage with efficient queries and caching"""
-    template_name = 'home.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Use cache for frequently accessed data
-        cache_key = 'homepage_data'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            # Efficient single query for profile
-            profile = Profile.objects.filter(is_active=True).first()
-            
-            # Optimized project query with select_related for technologies
-            latest_project = Project.objects.select_related().prefetch_related(
-                'technologies'
-            ).filter(status='published').order_by('-created_at').first()
-            
-            # Featured skills with single query
-            featured_skills = list(Skill.objects.filter(
-                is_featured=True
-            ).order_by('order')[:6])
-            
-            cached_data = {
-                'profile': profile,
-                'latest_project': latest_project,
-                'featured_skills': featured_skills,
-            }
-            
-            # Cache for 15 minutes
-            cache.set(cache_key, cached_data, 900)
-        
-        context.update(cached_data)
-        
-        # Blog posts (separate cache with shorter TTL)
-        blog_cache_key = 'homepage_blog_posts'
-        blog_data = cache.get(blog_cache_key)
-        
-        if blog_data is None:
-            from blog.models import Post
-            
-            # Single query with select_related for author and category
-            latest_posts = list(Post.objects.select_related(
-                'author', 'category'
-            ).filter(status='published').order_by('-published_at')[:3])
-            
-            blog_data = {
-                'latest_football_post': next((p for p in latest_posts if p.category and p.category.name.lower() == 'football'), None),
-                'latest_tech_posts': [p for p in latest_posts if not (p.category and p.category.name.lower() == 'football')][:2]
-            }
-            
-            # Cache blog data for 5 minutes (more dynamic content)
-            cache.set(blog_cache_key, blog_data, 300)
-        
-        context.update(blog_data)
-        return context
+# The homepage is served by views.HomeView (CacheManager.get_or_compute)
 
 
 class OptimizedPortfolioView(TemplateView):
@@ -114,18 +59,19 @@ class OptimizedProjectDetailView(DetailView):
     context_object_name = 'project'
     
     def get_queryset(self):
-        return Project.objects.select_related().prefetch_related(
-            'technologies'
-        ).filter(status='published')
+        return Project.objects.filter(status='published')
     
     def get_object(self):
-        """Cache individual project objects"""
+        """Cache individual project snapshots"""
         slug = self.kwargs.get('slug')
-        cache_key = f'project_detail_{slug}'
+        cache_key = CacheManager.make_key('projects', 'detail', slug, snapshots.schema_version())
         project = cache.get(cache_key)
         
         if project is None:
-            project = get_object_or_404(self.get_queryset(), slug=slug)
+            found = snapshots.project_snapshots(self.get_queryset().filter(slug=slug))
+            if not found:
+                raise Http404("No project found matching the query")
+            project = found[0]
             # Cache for 1 hour
             cache.set(cache_key, project, 3600)
         
@@ -146,12 +92,12 @@ class OptimizedSkillsView(ListView):
         context = super().get_context_data(**kwargs)
         
         # Cache grouped skills
-        cache_key = 'skills_grouped'
+        cache_key = CacheManager.make_key('skills', 'grouped', snapshots.schema_version())
         skills_by_type = cache.get(cache_key)
         
         if skills_by_type is None:
             skills_by_type = {}
-            for skill in context['skills']:
+            for skill in snapshots.skill_snapshots(self.get_queryset()):
                 skill_type = skill.get_skill_type_display()
                 if skill_type not in skills_by_type:
                     skills_by_type[skill_type] = []
@@ -164,11 +110,11 @@ class OptimizedSkillsView(ListView):
         return context
 
 
-# Add cache decorators to static views
-@cache_page(60 * 30)  # Cache for 30 minutes
-class AboutView(TemplateView):
+# Static views are served by the full-page cache (portfolio_blog.page_cache)
+class AboutView(SurrogateKeyMixin, TemplateView):
     """Cached About page"""
     template_name = 'portfolio/about.html'
+    surrogate_keys = ('profile',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -176,10 +122,10 @@ class AboutView(TemplateView):
         return context
 
 
-@cache_page(60 * 60)  # Cache for 1 hour
-class ContactView(TemplateView):
+class ContactView(SurrogateKeyMixin, TemplateView):
     """Cached Contact page"""
     template_name = 'portfolio/contact.html'
+    surrogate_keys = ('profile',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
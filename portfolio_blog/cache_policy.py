@@ -0,0 +1,126 @@
+"""
+Cache-Control policies by resolved URL name.
+
+``CACHE_CONTROL_POLICIES`` maps view names to policies. The keys are
+matched against ``request.resolver_match.view_name``:
+
+- an exact view name (``'portfolio:about'``, ``'home'``);
+- a glob (``'blog:*'`` for a whole namespace, ``'*-list'`` for router
+  list endpoints). Globs are tried in table order after exact names.
+
+Each value holds keyword arguments for ``CachePolicy``. The table is
+compiled once, when ``PerformanceMiddleware`` is created, and every
+view name's lookup is memoised after that.
+
+A view can override the table with the ``cache_policy`` decorator
+(function views or view classes). Authenticated users never get a
+shared-cacheable response: by default they get ``private, no-store``.
+A view that sets ``Cache-Control`` itself is left alone.
+"""
+
+import re
+from dataclasses import dataclass
+from fnmatch import translate
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+AUTHENTICATED_CHOICES = ('no-store', 'private')
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How browsers (``max_age``) and shared caches (``s_maxage``) may keep a response"""
+    max_age: int = None
+    s_maxage: int = None
+    stale_while_revalidate: int = None
+    no_store: bool = False
+    authenticated: str = 'no-store'
+
+    def __post_init__(self):
+        if self.authenticated not in AUTHENTICATED_CHOICES:
+            raise ValueError(
+                f"authenticated must be one of {AUTHENTICATED_CHOICES}, not {self.authenticated!r}"
+            )
+
+    def apply(self, response, authenticated=False):
+        if self.no_store or (authenticated and self.authenticated == 'no-store'):
+            patch_cache_control(response, private=True, no_store=True)
+            return response
+        if authenticated:
+            patch_cache_control(response, private=True, max_age=self.max_age or 0)
+            return response
+
+        directives = {'public': True}
+        if self.max_age is not None:
+            directives['max_age'] = self.max_age
+        if self.s_maxage is not None:
+            directives['s_maxage'] = self.s_maxage
+        if self.stale_while_revalidate is not None:
+            directives['stale_while_revalidate'] = self.stale_while_revalidate
+        patch_cache_control(response, **directives)
+        return response
+
+
+def cache_policy(**options):
+    """Give one view its own ``CachePolicy``, overriding the settings table.
+
+    Works on function views and view classes::
+
+        @cache_policy(max_age=60, s_maxage=300)
+        class PostSearchView(ListView):
+            ...
+    """
+    policy = CachePolicy(**options)
+
+    def decorator(view):
+        view.cache_policy = policy
+        return view
+
+    return decorator
+
+
+def view_policy(func):
+    """The decorator-set policy of a resolved view function, if any"""
+    policy = getattr(func, 'cache_policy', None)
+    if policy is None:
+        # as_view() functions: DRF exposes .cls, Django .view_class
+        view_class = getattr(func, 'view_class', None) or getattr(func, 'cls', None)
+        policy = getattr(view_class, 'cache_policy', None)
+    return policy if isinstance(policy, CachePolicy) else None
+
+
+class PolicyTable:
+    """``CACHE_CONTROL_POLICIES`` compiled for lookups by view name"""
+
+    def __init__(self, policies):
+        self.exact = {}
+        self.patterns = []
+        for name, options in policies.items():
+            policy = options if isinstance(options, CachePolicy) else CachePolicy(**options)
+            if any(char in name for char in '*?['):
+                self.patterns.append((re.compile(translate(name)), policy))
+            else:
+                self.exact[name] = policy
+        self._resolved = {}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(getattr(settings, 'CACHE_CONTROL_POLICIES', {}))
+
+    def lookup(self, view_name):
+        try:
+            return self._resolved[view_name]
+        except KeyError:
+            pass
+        policy = self.exact.get(view_name)
+        if policy is None:
+            policy = next((policy for pattern, policy in self.patterns if pattern.match(view_name)), None)
+        self._resolved[view_name] = policy
+        return policy
+
+    def policy_for(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        return view_policy(match.func) or (self.lookup(match.view_name) if match.view_name else None)
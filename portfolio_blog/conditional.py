@@ -0,0 +1,156 @@
+"""
+Conditional GET support (ETag / Last-Modified) for page views and the API.
+
+Validators come from one aggregate query over the rows a response is built
+from: the newest ``updated_at``/``published_at`` and the row count. They
+are checked before the context or serializer runs; a matching
+``If-None-Match`` or ``If-Modified-Since`` gets an empty 304.
+
+Only the ETag sees everything that changes a page. Its row count catches
+deletions and unpublishing, and views mix in the other data they render
+(``get_validator_extra``: sidebar counts, related rows without
+timestamps). ``Last-Modified`` is just the newest timestamp, which doesn't
+move when an older row goes away, so it is sent only for pages built from
+one row (``send_last_modified``).
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.generic.detail import SingleObjectMixin
+from rest_framework import status
+from rest_framework.response import Response
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+def compute_validators(queryset, fields=('updated_at',), extra=()):
+    """Return ``(etag, last_modified)`` for ``queryset`` in one query.
+
+    ``last_modified`` is a POSIX timestamp, or None when no row has one.
+    ``extra`` mixes request specifics (query string, user) into the ETag.
+    Returns ``(None, None)`` for an empty queryset.
+    """
+    aggregates = {f'max_{field}': Max(field) for field in fields}
+    values = queryset.order_by().aggregate(rows=Count('pk'), **aggregates)
+    if not values['rows']:
+        return None, None
+
+    stamps = [values[f'max_{field}'] for field in fields if values[f'max_{field}']]
+    last_modified = int(max(stamps).timestamp()) if stamps else None
+
+    parts = [str(values['rows'])] + [
+        values[f'max_{field}'].isoformat() if values[f'max_{field}'] else '' for field in fields
+    ] + [str(part) for part in extra]
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    # Weak: the same data may be rendered or compressed differently
+    return f'W/"{digest}"', last_modified
+
+
+def request_variant(request):
+    """What, besides the data, makes two responses for the same rows differ"""
+    user = getattr(request, 'user', None)
+    user_id = user.pk if user is not None and user.is_authenticated else ''
+    return (request.path, request.META.get('QUERY_STRING', ''), user_id)
+
+
+def set_validators(response, etag, last_modified):
+    if etag and not response.has_header('ETag'):
+        response.headers['ETag'] = quote_etag(etag)
+    if last_modified and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """ETag/Last-Modified and 304s for Django class-based views.
+
+    Detail views are validated on the object they look up, list views on
+    their whole queryset. Views override ``get_validator_queryset`` when the
+    page is built from other rows as well, and ``get_validator_extra`` for
+    data without a timestamp. ``send_last_modified`` defaults to detail
+    views only.
+    """
+    validator_fields = ('updated_at', 'published_at')
+    send_last_modified = None
+
+    def get_validator_queryset(self):
+        queryset = self.get_queryset()
+        if isinstance(self, SingleObjectMixin):
+            pk = self.kwargs.get(self.pk_url_kwarg)
+            slug = self.kwargs.get(self.slug_url_kwarg)
+            if pk is not None:
+                queryset = queryset.filter(pk=pk)
+            if slug is not None:
+                queryset = queryset.filter(**{self.get_slug_field(): slug})
+        return queryset
+
+    def get_validator_extra(self):
+        """Values, besides the validator queryset, that change the page"""
+        return ()
+
+    def get_validators(self):
+        etag, last_modified = compute_validators(
+            self.get_validator_queryset(),
+            self.validator_fields,
+            request_variant(self.request) + tuple(self.get_validator_extra()),
+        )
+        send_last_modified = self.send_last_modified
+        if send_last_modified is None:
+            send_last_modified = isinstance(self, SingleObjectMixin)
+        return etag, last_modified if send_last_modified else None
+
+    def not_modified(self, response):
+        """Hook for work that must happen even when the page isn't rendered"""
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return self.not_modified(set_validators(response, etag, last_modified))
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+
+
+class ConditionalGetViewSetMixin:
+    """ETag/Last-Modified and 304s for DRF list and retrieve actions.
+
+    Validators are computed over the filtered queryset (narrowed to the
+    looked-up object on ``retrieve``) before anything is serialized.
+    ``list`` responses get an ETag only (see the module docstring).
+    """
+    validator_fields = ('updated_at',)
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validators(self):
+        variant = request_variant(self.request) + (self.request.accepted_renderer.format,)
+        etag, last_modified = compute_validators(self.get_validator_queryset(), self.validator_fields, variant)
+        return etag, last_modified if self.action == 'retrieve' else None
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        if request.method not in CONDITIONAL_METHODS:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        if get_conditional_response(request._request, etag=etag, last_modified=last_modified) is not None:
+            return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,121 @@
+"""
+Sparse fieldsets and lightweight list representations for the API.
+
+``?fields=title,slug`` keeps only the named fields of each object and
+``?omit=content`` drops fields. Model columns that no remaining field reads
+are deferred, so they are neither fetched from the database nor
+serialized. List endpoints use the viewset's ``list_serializer_class``
+(without the heavy fields) unless ``?fields=`` asks for something
+explicitly.
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _parse_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetsSerializerMixin:
+    """Drop top-level fields according to the ``fields``/``omit`` context.
+
+    ``field_dependencies`` maps computed fields (properties) to the model
+    fields they read, so those are not deferred while the field is shown.
+    """
+    field_dependencies = {}
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_top_level():
+            return fields
+
+        requested = self.context.get('sparse_fields')
+        omitted = self.context.get('sparse_omit')
+        unknown = set(requested or ()) - set(fields)
+        if unknown:
+            raise ParseError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        for name in omitted or ():
+            fields.pop(name, None)
+        return fields
+
+    def get_used_model_fields(self):
+        """Names of the model fields read by the remaining serializer fields"""
+        used = set()
+        for name, field in self.fields.items():
+            if field.source == '*':
+                continue
+            source = field.source_attrs[0]
+            used.add(source)
+            if source.startswith('get_') and source.endswith('_display'):
+                # get_FOO_display() reads the choice field FOO
+                used.add(source[len('get_'):-len('_display')])
+            used.update(self.field_dependencies.get(name, ()))
+        return used
+
+
+class SparseFieldsetsMixin:
+    """Viewset support for ``?fields=``/``?omit=`` and list serializers.
+
+    ``list_serializer_class`` is used for ``list`` when set. On read
+    requests every concrete model column not needed by the serializer (or
+    by pagination, ordering and lookups) is deferred.
+    """
+    list_serializer_class = None
+
+    def get_sparse_params(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None, None
+        params = request.query_params
+        return _parse_names(params.get(FIELDS_PARAM)), _parse_names(params.get(OMIT_PARAM))
+
+    def get_serializer_class(self):
+        requested, _ = self.get_sparse_params()
+        if getattr(self, 'action', None) == 'list' and self.list_serializer_class is not None and not requested:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'], context['sparse_omit'] = self.get_sparse_params()
+        return context
+
+    def get_required_model_fields(self):
+        """Columns that must stay loaded whatever the fieldset"""
+        required = {self.lookup_field}
+        names = list(getattr(self, 'keyset_ordering', ()))
+        names += list(getattr(self, 'ordering_fields', None) or ())
+        names += list(getattr(self, 'ordering', None) or ())
+        required.update(name.lstrip('-') for name in names)
+        return required
+
+    def get_deferred_fields(self):
+        serializer = self.get_serializer()
+        if not isinstance(serializer, SparseFieldsetsSerializerMixin):
+            return []
+        used = serializer.get_used_model_fields() | self.get_required_model_fields()
+        return [
+            field.name for field in serializer.Meta.model._meta.concrete_fields
+            if not field.primary_key and not field.is_relation and field.name not in used
+        ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'request', None) is None or self.request.method not in SAFE_METHODS:
+            return queryset
+        deferred = self.get_deferred_fields()
+        return queryset.defer(*deferred) if deferred else queryset
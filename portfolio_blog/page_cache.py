@@ -0,0 +1,320 @@
+"""
+Full-page cache for anonymous reads.
+
+``PageCacheMiddleware`` stores the rendered bytes of a page plus a
+whitelist of its headers, and serves them before URL resolution, sessions
+or authentication run.
+
+- Only GET/HEAD requests without a session cookie or Authorization header
+  use the cache. Logged-in users, and anyone else with a session, bypass it.
+- A page is stored only if its view tags it with surrogate keys
+  (``SurrogateKeyMixin`` / ``add_surrogate_keys``), it is a 200, and it
+  sets no cookies. A CSRF token or a session write makes a page per-user.
+- Query strings: tracking parameters (``PAGE_CACHE_IGNORED_PARAMS``) are
+  left out of the key, so ``/blog/?utm_source=x`` shares ``/blog/``'s
+  entry. Any other parameter must be one the view reads
+  (``SurrogateKeyMixin.page_cache_params``), or the page isn't stored;
+  junk query strings can't fill the cache with copies of a page.
+- Surrogate keys are cache tags. The model signals in ``portfolio.signals``
+  invalidate them, which purges every page built from the changed rows.
+  The ``Surrogate-Key`` header is sent too, so a CDN can purge the same way.
+- Per-read side effects registered with ``on_hit`` (post view counts) still
+  run when the page comes from the cache, except for cache warm-ups.
+- Stale-while-revalidate: a page is fresh for ``PAGE_CACHE_TIMEOUT``
+  seconds, then served stale for up to ``PAGE_CACHE_STALE_TIMEOUT`` more
+  while one background re-render replaces it. Responses advertise the same
+  windows as ``s-maxage``/``stale-while-revalidate`` for shared caches.
+"""
+
+import copy
+import hashlib
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import cc_delim_re, get_conditional_response, get_max_age, patch_cache_control
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_http_date_safe
+from django.utils.module_loading import import_string
+
+from portfolio.cache_metrics import cache_metrics
+from portfolio.cache_refresh import background_enabled, schedule
+from portfolio.cache_utils import CacheManager
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+CACHE_STATUS_HEADER = 'X-Page-Cache'
+WARMUP_HEADER = 'X-Cache-Warmup'
+WARMUP_META = 'HTTP_X_CACHE_WARMUP'
+
+# Response headers replayed from the cache; anything else is dropped
+CACHED_HEADERS = (
+    'Content-Type', 'Content-Language', 'Cache-Control', 'ETag', 'Last-Modified',
+    'Link', 'Vary', 'X-Frame-Options', SURROGATE_KEY_HEADER,
+)
+
+VARY_KEY = 'pages:vary:{}'
+NAMESPACE = 'pages'
+
+
+def add_surrogate_keys(response, keys):
+    """Tag ``response`` with ``keys`` (cache tags of the rows it shows)"""
+    existing = response.get(SURROGATE_KEY_HEADER, '').split()
+    merged = existing + [key for key in keys if key not in existing]
+    if merged:
+        response[SURROGATE_KEY_HEADER] = ' '.join(merged)
+    return response
+
+
+def on_hit(request, action, *args):
+    """Call ``action`` (a dotted path) with ``args`` on cached hits of this page too"""
+    if not hasattr(request, 'page_cache_hits'):
+        request.page_cache_hits = []
+    request.page_cache_hits.append([action, list(args)])
+
+
+def is_refresh(request):
+    """True while the page cache re-renders a stale page in the background"""
+    return getattr(request, 'page_cache_refresh', False)
+
+
+def is_warmup(request):
+    """True for requests made by ``warm_caches`` (sent with WARMUP_HEADER).
+
+    Anyone can send the header; it only stops their own visit being counted.
+    """
+    return WARMUP_META in request.META
+
+
+def is_visit(request):
+    """Whether the request is a real visitor's (counters should count it)"""
+    return not (is_refresh(request) or is_warmup(request))
+
+
+class SurrogateKeyMixin:
+    """Tag a class-based view's successful responses for the page cache.
+
+    ``page_cache_params`` lists the query parameters the view reads; pages
+    requested with any other (non-tracking) parameter aren't stored.
+    """
+    surrogate_keys = ()
+    page_cache_params = ()
+
+    def get_surrogate_keys(self):
+        return list(self.surrogate_keys)
+
+    def dispatch(self, request, *args, **kwargs):
+        request.page_cache_params = self.page_cache_params
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            add_surrogate_keys(response, self.get_surrogate_keys())
+        return response
+
+
+def is_cacheable_request(request):
+    if not getattr(settings, 'PAGE_CACHE_ENABLED', False):
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or 'HTTP_AUTHORIZATION' in request.META:
+        return False
+    return not request.path.startswith(tuple(getattr(settings, 'PAGE_CACHE_EXCLUDE', ())))
+
+
+def query_params(request):
+    """``(name, value)`` pairs of the query string, minus tracking parameters"""
+    ignored = set(getattr(settings, 'PAGE_CACHE_IGNORED_PARAMS', ()))
+    return sorted(
+        (name, value) for name, values in request.GET.lists() if name not in ignored for value in values
+    )
+
+
+def is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    allowed = set(getattr(request, 'page_cache_params', ()))
+    if any(name not in allowed for name, _ in query_params(request)):
+        return False
+    # get_token() adds this key; CsrfViewMiddleware resets its value to
+    # False once the cookie is set, but never removes it
+    if 'CSRF_COOKIE_NEEDS_UPDATE' in request.META or not response.has_header(SURROGATE_KEY_HEADER):
+        return False
+    cache_control = response.get('Cache-Control', '').lower()
+    return not any(directive in cache_control for directive in ('private', 'no-store', 'no-cache'))
+
+
+def vary_headers(response):
+    """Request headers the page varies on; Cookie is covered by the bypass"""
+    if not response.has_header('Vary'):
+        return []
+    names = {name.strip().lower() for name in cc_delim_re.split(response['Vary'])}
+    names.discard('cookie')
+    names.discard('')
+    return sorted(names)
+
+
+def cache_url(request):
+    """The request's URL with tracking parameters dropped and the rest sorted"""
+    url = request.build_absolute_uri(request.path)
+    params = query_params(request)
+    return f'{url}?{urlencode(params)}' if params else url
+
+
+def _url_hash(request):
+    return hashlib.md5(cache_url(request).encode(), usedforsecurity=False).hexdigest()
+
+
+def page_key(request, headers):
+    values = [request.META.get('HTTP_' + name.upper().replace('-', '_'), '') for name in headers]
+    return CacheManager.make_key(NAMESPACE, cache_url(request), *values)
+
+
+def shared_max_age(response):
+    """``s-maxage`` if the response sets one, else ``max-age`` (what we may keep it for)"""
+    for directive in cc_delim_re.split(response.get('Cache-Control', '')):
+        name, _, value = directive.partition('=')
+        if name.strip().lower() == 's-maxage':
+            try:
+                return int(value)
+            except ValueError:
+                break
+    return get_max_age(response)
+
+
+def run_hit_actions(actions):
+    for action, args in actions:
+        import_string(action)(*args)
+
+
+def patch_shared_cache_control(response, fresh_for, stale_for):
+    """Let shared caches (CDN, proxies) keep the page as long as we do.
+
+    Browsers get ``max-age=0`` unless the view chose otherwise, so they
+    revalidate with the ETag/Last-Modified validators. A view's own
+    ``stale-while-revalidate`` is kept.
+    """
+    if get_max_age(response) is None:
+        patch_cache_control(response, max_age=0)
+    if 'stale-while-revalidate' in response.get('Cache-Control', ''):
+        stale_for = None  # the view's cache policy chose its own window
+    patch_cache_control(response, public=True, s_maxage=max(0, int(fresh_for)))
+    if stale_for is not None:
+        patch_cache_control(response, stale_while_revalidate=stale_for)
+
+
+def response_from_entry(request, entry, status):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for name, value in entry['headers']:
+        response[name] = value
+    response[CACHE_STATUS_HEADER] = status
+    patch_shared_cache_control(
+        response, entry.get('expires', 0) - time.time(), settings.PAGE_CACHE_STALE_TIMEOUT
+    )
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+        response=response,
+    )
+
+
+class PageCacheMiddleware(MiddlewareMixin):
+    """Serve and store anonymous pages (see module docstring).
+
+    Place it right after SecurityMiddleware/WhiteNoise: hits return before
+    the session and authentication middleware run.
+    """
+
+    def process_request(self, request):
+        if not is_cacheable_request(request):
+            return None
+        request._page_cache_miss = True
+        request._page_cache_started = time.monotonic()
+        headers = cache.get(VARY_KEY.format(_url_hash(request)))
+        if headers is None:
+            cache_metrics.miss(NAMESPACE)
+            return None
+        key = page_key(request, headers)
+        entry = CacheManager.read_tagged(key)
+        if entry is None:
+            cache_metrics.miss(NAMESPACE)
+            return None
+
+        if entry.get('expires', 0) > time.time():
+            status = 'HIT'
+            cache_metrics.hit(NAMESPACE)
+        elif not background_enabled():
+            cache_metrics.miss(NAMESPACE)
+            return None
+        else:
+            status = 'STALE'
+            cache_metrics.stale(NAMESPACE)
+            lock_key = f'{key}:lock'
+            token = uuid.uuid4().hex
+            if cache.add(lock_key, token, CacheManager.LOCK_TIMEOUT):
+                # Re-render on a pristine copy: inner middleware hasn't run yet
+                pristine = copy.copy(request)
+                pristine.META = request.META.copy()
+                schedule(self.refresh, pristine, lock_key, token)
+
+        request._page_cache_miss = False
+        if is_visit(request):
+            run_hit_actions(entry['hits'])
+        return response_from_entry(request, entry, status)
+
+    def refresh(self, request, lock_key, token):
+        """Render ``request`` through the rest of the stack and store it"""
+        request.page_cache_refresh = True
+        request.page_cache_hits = []
+        request._page_cache_started = time.monotonic()
+        response = None
+        try:
+            response = self.get_response(request)
+            self.store(request, response)
+        finally:
+            if response is not None:
+                response.close()
+            CacheManager.release_lock(lock_key, token)
+
+    def process_response(self, request, response):
+        if not getattr(request, '_page_cache_miss', False) or request.method != 'GET':
+            return response
+        if self.store(request, response):
+            response[CACHE_STATUS_HEADER] = 'MISS'
+        return response
+
+    def store(self, request, response):
+        """Store ``response`` if it may be shared; returns whether it was"""
+        if not is_cacheable_response(request, response):
+            return False
+        headers = vary_headers(response)
+        if '*' in headers:
+            return False
+
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        max_age = shared_max_age(response)
+        if max_age is not None:
+            timeout = min(timeout, max_age)
+        if timeout <= 0:
+            return False
+
+        stale_timeout = settings.PAGE_CACHE_STALE_TIMEOUT
+        patch_shared_cache_control(response, timeout, stale_timeout)
+        entry = {
+            'status': response.status_code,
+            'content': response.content,
+            'headers': [[name, response[name]] for name in CACHED_HEADERS if response.has_header(name)],
+            'hits': getattr(request, 'page_cache_hits', []),
+            'expires': time.time() + timeout,
+        }
+        cache.set(VARY_KEY.format(_url_hash(request)), headers, timeout + stale_timeout)
+        CacheManager.set_tagged(
+            page_key(request, headers), entry, response[SURROGATE_KEY_HEADER].split(), timeout + stale_timeout
+        )
+        started = getattr(request, '_page_cache_started', None)
+        cache_metrics.fill(
+            NAMESPACE, time.monotonic() - started if started else 0, len(entry['content'])
+        )
+        return True
@@ -0,0 +1,289 @@
+"""
+Keyset (cursor) pagination shared by the blog/portfolio views and the API.
+
+Pages are addressed by the sort key of their boundary row instead of an
+offset, so page N costs the same indexed range scan as page 1 and no
+``COUNT(*)`` is issued. A page URL keeps pointing at the same slice of
+content when new posts are published, which keeps crawled URLs stable.
+
+Ordering fields must be non-null; the last one should be unique (the pk).
+"""
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import BigIntegerField, F, Q
+from django.db.models.functions import Cast, Round
+from django.http import Http404
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _model_field(model, name):
+    """Model field for an ordering name, or None for annotations"""
+    if name == 'pk':
+        return model._meta.pk
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def encode_cursor(values):
+    data = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """Turn a cursor token back into typed values for ``ordering``"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+
+    fields = _parse_ordering(ordering)
+    if not isinstance(raw, list) or len(raw) != len(fields):
+        raise InvalidCursor(token)
+    try:
+        values = []
+        for (name, _), value in zip(fields, raw):
+            field = _model_field(model, name)
+            values.append(value if field is None else field.to_python(value))
+        return values
+    except ValidationError:
+        raise InvalidCursor(token)
+
+
+def cursor_for(obj, ordering):
+    values = []
+    for name, _ in _parse_ordering(ordering):
+        field = _model_field(type(obj), name)
+        # Annotations (e.g. a search rank) are plain JSON numbers
+        values.append(getattr(obj, name) if field is None else field.value_to_string(obj))
+    return encode_cursor(values)
+
+
+def keyset_filter(ordering, values, forward=True):
+    """Q selecting the rows strictly after (or before) the given key"""
+    condition = Q()
+    equal = {}
+    for (name, descending), value in zip(_parse_ordering(ordering), values):
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def reverse_ordering(ordering):
+    return [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset"""
+
+    is_keyset = True
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return cursor_for(self.object_list[-1], self.ordering)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return cursor_for(self.object_list[0], self.ordering)
+        return None
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by ``ordering`` without OFFSET or COUNT"""
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = int(per_page)
+
+    def page(self, after=None, before=None):
+        """Return the page following cursor ``after`` or preceding ``before``.
+
+        Raises InvalidCursor for malformed tokens.
+        """
+        model = self.queryset.model
+        if before:
+            values = decode_cursor(before, model, self.ordering)
+            rows = list(
+                self.queryset.filter(keyset_filter(self.ordering, values, forward=False))
+                .order_by(*reverse_ordering(self.ordering))[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            rows.reverse()
+            return KeysetPage(rows, self.ordering, has_next=True, has_previous=has_previous)
+
+        queryset = self.queryset
+        if after:
+            values = decode_cursor(after, model, self.ordering)
+            queryset = queryset.filter(keyset_filter(self.ordering, values))
+        rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page], self.ordering, has_next=has_next, has_previous=bool(after))
+
+
+class KeysetPaginationMixin:
+    """Cursor pagination for ListView subclasses.
+
+    ``?after=<cursor>`` / ``?before=<cursor>`` select the page. Legacy
+    ``?page=N`` links (already indexed by search engines) still resolve
+    through Django's offset paginator.
+    """
+    keyset_ordering = ('-published_at', '-id')
+    after_param = 'after'
+    before_param = 'before'
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.page_kwarg in self.request.GET or self.page_kwarg in self.kwargs:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, self.keyset_ordering, page_size)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get(self.after_param),
+                before=self.request.GET.get(self.before_param),
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class KeysetPagination(pagination.BasePagination):
+    """DRF cursor pagination keyed on the view's ordering plus a pk tie-breaker.
+
+    Views set ``keyset_ordering``; an explicit ``?ordering=`` accepted by
+    OrderingFilter takes precedence. Querysets annotated with
+    ``rank_annotation`` (ranked search results) page by relevance.
+
+    The rank is a float (``ts_rank`` is float4), which doesn't survive the
+    JSON cursor exactly, so equal ranks would never compare equal and tied
+    rows would be skipped. Pages are keyed on the rank scaled to an
+    integer (``rank_key``) instead.
+    """
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('-published_at', '-id')
+    rank_annotation = 'search_rank'
+    rank_key = 'search_rank_key'
+    rank_scale = 10 ** 6
+    after_query_param = 'after'
+    before_query_param = 'before'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if OrderingFilter in getattr(view, 'filter_backends', []):
+            if request.query_params.get(api_settings.ORDERING_PARAM):
+                ordering = OrderingFilter().get_ordering(request, queryset, view)
+        if not ordering and self.rank_key in queryset.query.annotations:
+            ordering = [f'-{self.rank_key}']
+        if not ordering:
+            ordering = getattr(view, 'keyset_ordering', self.ordering)
+        ordering = list(ordering)
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering.append('-id')
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.rank_annotation in queryset.query.annotations:
+            queryset = queryset.annotate(**{
+                self.rank_key: Cast(Round(F(self.rank_annotation) * self.rank_scale), BigIntegerField())
+            })
+        paginator = KeysetPaginator(queryset, self.get_ordering(request, queryset, view), self.page_size)
+        try:
+            self.page = paginator.page(
+                after=request.query_params.get(self.after_query_param),
+                before=request.query_params.get(self.before_query_param),
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return list(self.page.object_list)
+
+    def _link(self, param, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.after_query_param)
+        url = remove_query_param(url, self.before_query_param)
+        return replace_query_param(url, param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.after_query_param, self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.before_query_param, self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': param,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {'type': 'string'},
+            }
+            for param, description in (
+                (self.after_query_param, 'Cursor of the last item on the previous page'),
+                (self.before_query_param, 'Cursor of the first item on the next page'),
+            )
+        ]
@@ -0,0 +1,99 @@
+"""
+Preload and preconnect hints for HTML pages.
+
+Two settings describe what a page needs before its HTML arrives:
+
+- ``PRECONNECT_ORIGINS``: third-party origins every page loads from. An
+  entry is an origin, or ``(origin, crossorigin)`` for CORS fetches
+  (web fonts).
+- ``CRITICAL_ASSETS``: static files to preload, keyed by template name,
+  ``'*'`` for every page. An entry is ``(path, as)``, e.g.
+  ``('css/custom.css', 'style')``.
+
+Paths are resolved through the staticfiles storage, exactly like
+``{% static %}``, so a preload always matches the URL the page requests
+(the hashed name under a manifest storage). Files the storage doesn't
+have are skipped instead of preloading a 404. Each template's hints are
+built once per process.
+
+``PerformanceMiddleware`` sends the hints as a ``Link`` header on the
+final response. WSGI has no way to send a 103 Early Hints response (and
+gunicorn doesn't offer one), so early hints come from the CDN: Cloudflare
+and Fastly turn the ``Link`` header of a cached response into a 103.
+"""
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+FONT_TYPES = {'.woff2': 'font/woff2', '.woff': 'font/woff', '.ttf': 'font/ttf'}
+
+
+def static_exists(path):
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    if hashed_files:
+        return staticfiles_storage.hash_key(path) in hashed_files
+    return finders.find(path) is not None
+
+
+def preload_link(path, as_):
+    link = f'<{staticfiles_storage.url(path)}>; rel=preload; as={as_}'
+    if as_ == 'font':
+        # Fonts are always fetched in CORS mode; the preload must match
+        font_type = next((mime for ext, mime in FONT_TYPES.items() if path.endswith(ext)), None)
+        link += '; crossorigin'
+        if font_type:
+            link += f'; type={font_type}'
+    return link
+
+
+def preconnect_link(entry):
+    if isinstance(entry, str):
+        return f'<{entry}>; rel=preconnect'
+    origin, crossorigin = entry
+    link = f'<{origin}>; rel=preconnect'
+    if crossorigin:
+        link += '; crossorigin' if crossorigin is True else f'; crossorigin={crossorigin}'
+    return link
+
+
+class ResourceHints:
+    """``Link`` values per template, built from the settings on first use"""
+
+    def __init__(self, preconnect=(), critical_assets=None):
+        self.preconnect = list(preconnect)
+        self.critical_assets = critical_assets or {}
+        self._links = {}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            getattr(settings, 'PRECONNECT_ORIGINS', ()),
+            getattr(settings, 'CRITICAL_ASSETS', {}),
+        )
+
+    def links(self, template_name):
+        try:
+            return self._links[template_name]
+        except KeyError:
+            pass
+        assets = list(self.critical_assets.get('*', ())) + list(self.critical_assets.get(template_name, ()))
+        links = [preconnect_link(entry) for entry in self.preconnect]
+        links += [preload_link(path, as_) for path, as_ in assets if static_exists(path)]
+        self._links[template_name] = links
+        return links
+
+    def for_view(self, view_func):
+        """Hints for a template-rendering class-based view, else None"""
+        view_class = getattr(view_func, 'view_class', None)
+        if view_class is None or not hasattr(view_class, 'template_name'):
+            return None
+        return self.links(view_class.template_name)
+
+
+def add_link_header(response, links):
+    existing = response.get('Link', '')
+    merged = [link for link in links if link not in existing]
+    if merged:
+        response['Link'] = ', '.join(filter(None, [existing] + merged))
+    return response
@@ -0,0 +1,134 @@
+"""
+Per-request phase timings for the ``Server-Timing`` response header.
+
+``PerformanceMiddleware`` collects timings for a sample of requests
+(``SERVER_TIMING_SAMPLE_RATE``, 0 to 1) and reports them as:
+
+- ``db``: SQL time and query count, via ``connection.execute_wrapper``;
+- ``cache``: time spent in cache backend calls, and their count;
+- ``view``: the view, from ``process_view`` until its response is back;
+- ``tpl``: rendering of the template response (DRF renderers included);
+- ``total``: everything inside the middleware.
+
+The phases overlap: ``view`` includes the view's own queries. Browser
+devtools show the header in the network panel, and RUM scripts can read
+it from ``PerformanceResourceTiming.serverTiming``.
+
+Cache calls are timed by wrapping the methods of the configured cache
+backend classes, once at startup. Outside a sampled request the wrappers
+do one context variable lookup and call through.
+"""
+
+import functools
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+HEADER = 'Server-Timing'
+CACHE_METHODS = (
+    'get', 'set', 'add', 'delete', 'touch', 'incr', 'decr', 'has_key',
+    'get_many', 'set_many', 'delete_many', 'get_or_set',
+)
+
+_current = ContextVar('server_timings', default=None)
+_instrumented = set()
+
+
+class Timings:
+    """Accumulated durations and counts per metric for one request"""
+
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+        self.cache_depth = 0
+
+    def add(self, metric, seconds, count=1):
+        self.durations[metric] = self.durations.get(metric, 0.0) + seconds
+        self.counts[metric] = self.counts.get(metric, 0) + count
+
+    def header(self):
+        entries = []
+        for metric, label in (('db', 'queries'), ('cache', 'calls'), ('view', None), ('tpl', None), ('total', None)):
+            if metric not in self.durations:
+                continue
+            entry = f'{metric};dur={self.durations[metric] * 1000:.1f}'
+            if label:
+                entry += f';desc="{self.counts[metric]} {label}"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+def sample_rate():
+    return getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 0.0)
+
+
+def sampled():
+    rate = sample_rate()
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def current():
+    """Timings of the request being sampled on this thread, or None"""
+    return _current.get()
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.add('db', time.perf_counter() - started)
+
+
+@contextmanager
+def collect():
+    """Collect timings for the code inside the block"""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_db_wrapper))
+            yield timings
+    finally:
+        _current.reset(token)
+
+
+def _timed_cache_method(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        # get_or_set() and friends call other wrapped methods; time the outer call only
+        if timings is None or timings.cache_depth:
+            return method(*args, **kwargs)
+        timings.cache_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.cache_depth -= 1
+            timings.add('cache', time.perf_counter() - started)
+
+    wrapper.server_timing = True
+    return wrapper
+
+
+def instrument_caches():
+    """Time calls on every configured cache backend class (idempotent)"""
+    for alias in settings.CACHES:
+        backend_class = type(caches[alias])
+        if backend_class in _instrumented:
+            continue
+        for name in CACHE_METHODS:
+            method = getattr(backend_class, name, None)
+            if method is None or getattr(method, 'server_timing', False):
+                continue
+            setattr(backend_class, name, _timed_cache_method(method))
+        _instrumented.add(backend_class)
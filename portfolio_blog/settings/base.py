@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 
 
@@ -76,6 +76,8 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static files for production
+    "portfolio.middleware.CompressionMiddleware",  # Brotli/gzip, also for cached pages
+    "portfolio_blog.page_cache.PageCacheMiddleware",  # Anonymous pages, before sessions/auth
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -84,6 +86,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "portfolio.middleware.PerformanceMiddleware",  # Cache-Control policies, innermost
 ]
 
 ROOT_URLCONF = "portfolio_blog.urls"
@@ -262,6 +265,109 @@ TAGGIT_CASE_INSENSITIVE = True
 ADSENSE_AD_CLIENT = config('ADSENSE_AD_CLIENT', default='ca-pub-7667391240665296')
 ADSENSE_AD_SLOT = config('ADSENSE_AD_SLOT', default='')
 
+# Blog view counter (write-behind)
+# BLOG_VIEW_COUNT_BUFFER: 'cache' (shared Redis counters), 'local' (per-process) or 'auto'
+# BLOG_VIEW_COUNT_FLUSH_INTERVAL: seconds between background flushes to the database
+BLOG_VIEW_COUNT_BUFFER = config('BLOG_VIEW_COUNT_BUFFER', default='auto')
+BLOG_VIEW_COUNT_FLUSH_INTERVAL = config('BLOG_VIEW_COUNT_FLUSH_INTERVAL', default=60, cast=int)
+
+# Hosts whose https iframes (video embeds) post bodies may keep (blog.content).
+# Comma-separated; run process_post_content --force after changing it.
+BLOG_IFRAME_HOSTS = config(
+    'BLOG_IFRAME_HOSTS',
+    default='www.youtube.com,www.youtube-nocookie.com,player.vimeo.com',
+    cast=Csv(),
+)
+
+# In-process cache tier in front of the shared cache (portfolio.cache_tiers)
+# CACHE_LOCAL_MAXSIZE: entries kept per worker (0 disables the tier)
+# CACHE_LOCAL_TTL: upper bound in seconds on how long a worker keeps a local copy
+# CACHE_INVALIDATION_BUS: 'redis' (pub/sub across workers), 'local' (in-process) or 'auto'
+CACHE_LOCAL_MAXSIZE = config('CACHE_LOCAL_MAXSIZE', default=512, cast=int)
+CACHE_LOCAL_TTL = config('CACHE_LOCAL_TTL', default=10, cast=int)
+CACHE_INVALIDATION_BUS = config('CACHE_INVALIDATION_BUS', default='auto')
+
+# Stale-while-revalidate refreshes (portfolio.cache_refresh)
+# CACHE_BACKGROUND_REFRESH: recompute stale entries in a thread pool (False: in the request)
+# CACHE_REFRESH_WORKERS: refresh threads per worker process
+CACHE_BACKGROUND_REFRESH = config('CACHE_BACKGROUND_REFRESH', default=True, cast=bool)
+CACHE_REFRESH_WORKERS = config('CACHE_REFRESH_WORKERS', default=2, cast=int)
+
+# Cache metrics per namespace (portfolio.cache_metrics)
+# CACHE_METRICS_ENABLED: count hits, misses, stale serves and fills
+# CACHE_METRICS_FLUSH_INTERVAL: seconds between adding a worker's counts to the shared totals
+CACHE_METRICS_ENABLED = config('CACHE_METRICS_ENABLED', default=True, cast=bool)
+CACHE_METRICS_FLUSH_INTERVAL = config('CACHE_METRICS_FLUSH_INTERVAL', default=30, cast=int)
+
+# Full-page cache for anonymous reads (portfolio_blog.page_cache)
+# PAGE_CACHE_ENABLED: serve and store pages tagged with surrogate keys
+# PAGE_CACHE_TIMEOUT: seconds a page is fresh unless a surrogate key is purged first
+# PAGE_CACHE_STALE_TIMEOUT: seconds after that it is served stale while re-rendered in the background
+# PAGE_CACHE_EXCLUDE: path prefixes never cached
+# PAGE_CACHE_IGNORED_PARAMS: tracking query parameters left out of page keys
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+PAGE_CACHE_STALE_TIMEOUT = config('PAGE_CACHE_STALE_TIMEOUT', default=300, cast=int)
+PAGE_CACHE_EXCLUDE = ['/admin/', '/accounts/', '/api/', '/ckeditor/', '/portfolio/create-users/']
+PAGE_CACHE_IGNORED_PARAMS = [
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid',
+]
+
+# Versioned template fragments ({% cachefragment %}): keys change with the
+# objects shown, so this only bounds how long unused fragments linger
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24 * 7, cast=int)
+
+# Cache-Control by resolved URL name (portfolio_blog.cache_policy).
+# Keys are view names or globs ('blog:*', '*-list'); values are CachePolicy
+# options: max_age, s_maxage, stale_while_revalidate, no_store and
+# authenticated ('no-store' or 'private'). Views without a policy get the
+# page cache's defaults; views can override with @cache_policy(...).
+CACHE_CONTROL_POLICIES = {
+    # Rarely changing pages
+    'portfolio:about': {'max_age': 3600, 'stale_while_revalidate': 86400},
+    'portfolio:contact': {'max_age': 3600, 'stale_while_revalidate': 86400},
+    'portfolio:privacy': {'max_age': 3600, 'stale_while_revalidate': 86400},
+    'portfolio:terms': {'max_age': 3600, 'stale_while_revalidate': 86400},
+    # Portfolio pages
+    'portfolio:*': {'max_age': 1800},
+    # API (router endpoints)
+    'api-root': {'max_age': 300},
+    '*-list': {'max_age': 300},
+    '*-detail': {'max_age': 300},
+}
+
+# Server-Timing header (portfolio_blog.server_timing): fraction of requests,
+# 0 to 1, that report DB, cache, view and template timings
+SERVER_TIMING_SAMPLE_RATE = config('SERVER_TIMING_SAMPLE_RATE', default=0.0, cast=float)
+
+# Preload/preconnect hints (portfolio_blog.resource_hints), sent as a Link
+# header (CDNs with Early Hints support turn it into a 103).
+# PRECONNECT_ORIGINS: third-party origins base.html loads from
+# CRITICAL_ASSETS: static files to preload per template ('*' = every page)
+PRECONNECT_ORIGINS = [
+    'https://cdn.tailwindcss.com',
+    'https://fonts.googleapis.com',
+    ('https://fonts.gstatic.com', True),
+    'https://cdnjs.cloudflare.com',
+]
+CRITICAL_ASSETS = {
+    '*': [('css/custom.css', 'style')],
+    'home.html': [('img/ilyas.jpg', 'image')],
+}
+
+# Response compression (portfolio.middleware.CompressionMiddleware)
+# COMPRESSION_MIN_SIZE: bodies shorter than this (bytes) aren't worth compressing
+# COMPRESSION_BROTLI_QUALITY: 0-11; mid values keep per-request CPU low
+# COMPRESSION_BREACH_SAFE: pad (gzip) responses that carry a CSRF token
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=200, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+COMPRESSION_BREACH_SAFE = config('COMPRESSION_BREACH_SAFE', default=True, cast=bool)
+COMPRESSION_CONTENT_TYPES = [
+    'text/html', 'text/plain', 'text/css', 'text/javascript', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+]
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default=False, cast=bool)
 CORS_ALLOWED_ORIGINS = config(
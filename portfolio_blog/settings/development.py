@@ -16,6 +16,12 @@ DATABASES = {
 # Email backend for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Pages are rendered fresh while templates are being edited
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=False, cast=bool)
+
+# Every response shows where its time went (devtools network panel)
+SERVER_TIMING_SAMPLE_RATE = config('SERVER_TIMING_SAMPLE_RATE', default=1.0, cast=float)
+
 # CORS settings for development
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -45,7 +45,8 @@ if REDIS_URL:
                     'ssl_check_hostname': False,
                 },
                 'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
-                'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
+                # Packs cache snapshots compactly (see portfolio.cache_serializers)
+                'SERIALIZER': 'portfolio.cache_serializers.SnapshotMSGPackSerializer',
             },
             'KEY_PREFIX': 'portfolio',
             'TIMEOUT': 300,  # 5 minutes default
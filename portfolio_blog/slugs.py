@@ -0,0 +1,107 @@
+"""
+Unique slug allocation shared by blog posts and portfolio projects.
+
+The next free ``-N`` suffix is found with a single prefix query on the
+(indexed) slug column instead of probing ``base``, ``base-1``, ``base-2``...
+one query at a time. Two concurrent saves can still pick the same slug, so
+``save_with_unique_slug`` retries the save when the unique constraint
+rejects it.
+"""
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 3
+
+
+def _taken_slugs(model, bases, field='slug', exclude_pk=None):
+    """Existing slugs equal to, or starting with, any of ``bases``"""
+    condition = Q()
+    for base in bases:
+        condition |= Q(**{field: base}) | Q(**{f'{field}__startswith': f'{base}-'})
+    queryset = model._default_manager.filter(condition)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return set(queryset.values_list(field, flat=True))
+
+
+def _next_free(base, taken, max_length):
+    """``base`` or ``base-N`` with the lowest N that is not in ``taken``"""
+    if base not in taken:
+        return base
+
+    pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    used = {int(match.group(1)) for match in map(pattern.match, taken) if match}
+    counter = 1
+    while True:
+        if counter not in used:
+            suffix = f'-{counter}'
+            candidate = f'{base[:max_length - len(suffix)]}{suffix}'
+            if candidate not in taken:
+                return candidate
+        counter += 1
+
+
+def _base_slug(value, max_length):
+    return (slugify(value)[:max_length].strip('-')) or 'item'
+
+
+def unique_slug(instance, value, field='slug'):
+    """Return a slug for ``instance`` built from ``value`` that no other row uses"""
+    model = type(instance)
+    max_length = model._meta.get_field(field).max_length
+    base = _base_slug(value, max_length)
+    return _next_free(base, _taken_slugs(model, [base], field, exclude_pk=instance.pk), max_length)
+
+
+def assign_unique_slugs(instances, source='title', field='slug'):
+    """Give unsaved ``instances`` unique slugs ahead of ``bulk_create``.
+
+    Empty slugs are built from the ``source`` attribute. One query covers
+    the whole batch, and slugs handed out within the batch are honoured.
+    """
+    instances = list(instances)
+    if not instances:
+        return instances
+
+    model = type(instances[0])
+    max_length = model._meta.get_field(field).max_length
+    bases = [
+        _base_slug(getattr(instance, field) or getattr(instance, source), max_length)
+        for instance in instances
+    ]
+    taken = _taken_slugs(model, set(bases), field)
+    for instance, base in zip(instances, bases):
+        slug = _next_free(base, taken, max_length)
+        setattr(instance, field, slug)
+        taken.add(slug)
+    return instances
+
+
+def save_with_unique_slug(instance, save, source, *args, field='slug', **kwargs):
+    """Allocate ``instance``'s slug and call ``save(*args, **kwargs)``.
+
+    ``save`` is the model's parent ``save``. An explicit slug is kept as the
+    base and suffixed only when it is already taken; when a concurrent save
+    claims the same slug first, the slug is reallocated and the save retried.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and field not in update_fields:
+        return save(*args, **kwargs)
+
+    value = getattr(instance, field) or source
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        setattr(instance, field, unique_slug(instance, value, field))
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            model = type(instance)
+            clash = model._default_manager.filter(
+                **{field: getattr(instance, field)}
+            ).exclude(pk=instance.pk).exists()
+            if not clash or attempt == MAX_ATTEMPTS:
+                raise